@@ -1,14 +1,12 @@
 from dash import Dash, html, dcc, Input, Output, State, MATCH, ALL
-import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
 import pandas as pd
 import plotly.express as px
 import dash_bootstrap_components as dbc
 import dash
-from flask import Flask, redirect
+from flask import Flask, redirect, jsonify
 from pages import Navbar
+from data.db import memory_report, pool_metrics, start_refresher
+from data.memo import memo_stats
 
 external_stylesheets = ['https://codepen.io/chriddyp/pen/bWLwgP.css','https://cdn.jsdelivr.net/npm/aos@2.3.4/dist/aos.css']
 dbc_css = "https://cdn.jsdelivr.net/gh/AnnMarieW/dash-bootstrap-templates/dbc.min.css"
@@ -22,6 +20,21 @@ def index_redirect():
     return redirect('/Home')
 
 
+@server.route('/debug/pool')
+def debug_pool():
+    return jsonify(pool_metrics())
+
+
+@server.route('/debug/memory')
+def debug_memory():
+    return jsonify(memory_report())
+
+
+@server.route('/debug/memo')
+def debug_memo():
+    return jsonify(memo_stats())
+
+
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.ZEPHYR, dbc_css, dbc.icons.BOOTSTRAP,
         "https://fonts.googleapis.com/css2?family=Material+Symbols+Outlined:opsz,wght,FILL,GRAD@20..48,100..700,0..1,-50..200",
         "https://fonts.googleapis.com/css2?family=Roboto:ital,wght@0,100;0,300;0,400;0,500;0,700;0,900;1,100;1,300;1,400;1,500;1,700;1,900&display=swap",
@@ -43,6 +56,9 @@ app.layout = dbc.Container([
 
 server = app.server
 
+# Pick up newly submitted rows without a restart
+start_refresher()
+
 
 @app.callback(
 
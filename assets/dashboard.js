@@ -0,0 +1,44 @@
+// assets/dashboard.js
+// Clientside callbacks for pages/Dashboard.py
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  dashboard: {
+    // Overview tab: pick the figure for `view` out of the store and swap in the values,
+    // axis labels and pie text of `mode`, without a trip to the server.
+    overview_figures: function (data, mode, view) {
+      if (!data) {
+        throw window.dash_clientside.PreventUpdate;
+      }
+      const spec = data.modes[mode];
+      const values = data.values[mode];
+      const copy = (fig) => JSON.parse(JSON.stringify(fig));
+
+      const main = copy(data.figures[view]);
+      main.data.forEach((trace, i) => {
+        trace.x = values[view][i];
+      });
+      Object.keys(main.layout)
+        .filter((key) => key.startsWith("xaxis"))
+        .forEach((key) => {
+          const axis = main.layout[key];
+          axis.title = Object.assign({}, axis.title, { text: spec.label });
+        });
+      if (spec.tickformat === null) {
+        delete main.layout.xaxis.tickformat;
+      } else {
+        main.layout.xaxis.tickformat = spec.tickformat;
+      }
+
+      const pie = (name) => {
+        const fig = copy(data.figures[name]);
+        Object.assign(fig.data[0], {
+          values: values[name],
+          textinfo: spec.textinfo,
+          hovertemplate: spec.hovertemplate,
+        });
+        return fig;
+      };
+
+      return [main, data.titles[view], data.captions[view], pie("gender"), pie("product")];
+    },
+  },
+});
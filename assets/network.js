@@ -0,0 +1,154 @@
+// assets/network.js
+// Clientside callbacks for pages/Network.py
+
+// Keyframes of a window with their deltas added up, worked out once per window
+const networkDecoded = new WeakMap();
+
+function networkKeyframes(buffer) {
+  if (!networkDecoded.has(buffer)) {
+    const add = (previous, change) => change.map((value, i) => (previous[i] || 0) + value);
+    let xy = [], w = [], s = [];
+    networkDecoded.set(
+      buffer,
+      buffer.keyframes.map((key) => {
+        if (key.xy) {
+          [xy, w, s] = [key.xy, key.w, key.s];
+        } else {
+          [xy, w, s] = [add(xy, key.dxy), add(w, key.dw), add(s, key.ds)];
+        }
+        return { xy: xy, w: w, s: s };
+      })
+    );
+  }
+  return networkDecoded.get(buffer);
+}
+
+// Edge, node and midpoint trace data for keyframe `to`, moved `t` of the way there from
+// keyframe `from`; nodes and edges new in `to` appear where `to` has them.
+function networkTraces(buffer, from, to, t) {
+  const lerp = (a, b) => (a === undefined ? b : a + (b - a) * t);
+  const n = to.s.length;
+  const x = [], y = [], score = [];
+  for (let i = 0; i < n; i++) {
+    x.push(lerp(from.xy[2 * i], to.xy[2 * i]));
+    y.push(lerp(from.xy[2 * i + 1], to.xy[2 * i + 1]));
+    score.push(lerp(from.s[i], to.s[i]));
+  }
+  const nodes = buffer.nodes.slice(0, n);
+
+  const edges = { x: [], y: [], hovertext: [] };
+  const mids = { x: [], y: [], hovertext: [] };
+  to.w.forEach((weight, e) => {
+    const [u, v] = buffer.edges[e];
+    const text = `${nodes[u]} ↔ ${nodes[v]}  |  co-occurrences: ${Math.round(lerp(from.w[e], weight))}`;
+    edges.x.push(x[u], x[v], null);
+    edges.y.push(y[u], y[v], null);
+    edges.hovertext.push(text);
+    mids.x.push((x[u] + x[v]) / 2);
+    mids.y.push((y[u] + y[v]) / 2);
+    mids.hovertext.push(text);
+  });
+
+  const max = Math.max(0, ...score) || 1;
+  return [
+    edges,
+    {
+      x: x,
+      y: y,
+      text: nodes,
+      hovertext: nodes.map((node, i) => `${node}  |  occurrences: ${Math.round(score[i])}`),
+      marker: {
+        size: score.map((s) => 10 + (s / max) * 40),
+        color: nodes.map((node) =>
+          node.startsWith("Purchase") ? "#1f77b4" : node.startsWith("Browse") ? "#ff7f0e" : "#2ca02c"
+        ),
+      },
+    },
+    mids,
+  ];
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  network: {
+    // Ask the server for a window of keyframes starting at `value` when the slider leaves the
+    // keyframes in the buffer, or gets within `config.prefetch` of the end of them.
+    request_frames: function (value, buffer, pending, config) {
+      const no_update = window.dash_clientside.no_update;
+      if (buffer) {
+        const end = buffer.start + buffer.keyframes.length;
+        const buffered = value >= buffer.start && value < end;
+        if (buffered && (end >= buffer.total || end - value > config.prefetch)) {
+          return no_update;
+        }
+      }
+      // a window holding this keyframe has been asked for already and is on its way
+      if (
+        pending &&
+        (!buffer || pending.start !== buffer.start) &&
+        value >= pending.start &&
+        value < pending.start + config.window - config.prefetch
+      ) {
+        return no_update;
+      }
+      // keyframes of the frame count the slider was built for
+      return { start: value, frames: config.frames };
+    },
+
+    // Draw keyframe `value`, or during playback the step `playhead` is at between it and the
+    // next one, if it is in the buffer; otherwise wait for its window.
+    show_frame: function (value, playhead, buffer, figure, config) {
+      const no_update = window.dash_clientside.no_update;
+      if (!buffer || !figure) {
+        return [no_update, no_update];
+      }
+      const keys = networkKeyframes(buffer);
+      const i = value - buffer.start;
+      if (!keys[i]) {
+        return [no_update, no_update];
+      }
+      let to = keys[i], t = 0;
+      if (playhead && playhead.key === value && playhead.step > 0 && keys[i + 1]) {
+        to = keys[i + 1];
+        t = playhead.step / config.steps;
+      }
+      const data = figure.data.slice();
+      networkTraces(buffer, keys[i], to, t).forEach((update, j) => {
+        const trace = Object.assign({}, data[j], update);
+        if (update.marker) {
+          trace.marker = Object.assign({}, data[j].marker, update.marker);
+        }
+        data[j] = trace;
+      });
+
+      const record = buffer.records[i] + (t ? (buffer.records[i + 1] - buffer.records[i]) * t : 0);
+      const label = `Record ${Math.round(record).toLocaleString()} of ${buffer.last_record.toLocaleString()}`;
+      return [Object.assign({}, figure, { data: data }), label];
+    },
+
+    // Play/Pause: every `config.steps` interval ticks the slider moves on one keyframe, with the
+    // playhead stepping through the interpolation in between. It only moves onto keyframes that
+    // have arrived, so playback waits for a slow window instead of skipping.
+    play: function (play, pause, n_intervals, value, max, buffer, playhead, config) {
+      const no_update = window.dash_clientside.no_update;
+      const triggered = window.dash_clientside.callback_context.triggered.map((t) => t.prop_id);
+      if (triggered.includes("network-pause.n_clicks")) {
+        return [no_update, true, null];
+      }
+      if (triggered.includes("network-play.n_clicks")) {
+        return [value >= max ? 0 : no_update, false, null];
+      }
+      if (value >= max) {
+        return [no_update, true, null];
+      }
+      const next = value + 1;
+      if (!buffer || next < buffer.start || next >= buffer.start + buffer.keyframes.length) {
+        return [no_update, false, no_update];
+      }
+      const step = (playhead && playhead.key === value ? playhead.step : 0) + 1;
+      if (step >= config.steps) {
+        return [next, false, { key: next, step: 0 }];
+      }
+      return [no_update, false, { key: value, step: step }];
+    },
+  },
+});
@@ -0,0 +1,90 @@
+import contextvars
+import functools
+import os
+
+from dash import Output, callback
+
+from data.db import data_version
+from data.memo import MEMO_TTL_SECONDS
+
+# DASHBOARD_BACKGROUND_CALLBACKS=1 runs heavy callbacks in worker processes (needs diskcache,
+# multiprocess and psutil). Off by default: every background call waits at least one poll.
+BACKGROUND_CALLBACKS = os.getenv("DASHBOARD_BACKGROUND_CALLBACKS", "0") == "1"
+CALLBACK_CACHE_DIR = os.getenv(
+    "DASHBOARD_CALLBACK_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache", "callbacks"),
+)
+# finished results are kept this long for requests with the same arguments
+CALLBACK_CACHE_SECONDS = float(os.getenv("DASHBOARD_CALLBACK_CACHE_SECONDS", str(MEMO_TTL_SECONDS)))
+# how often the browser asks whether a job is done, in ms
+POLL_INTERVAL_MS = 250
+
+_manager = None
+_progress = contextvars.ContextVar("progress", default=None)
+
+
+def manager():
+    """
+    Disk-cache background callback manager, shared by every worker process of this machine.
+    Results are cached by the callback's arguments and the data version.
+    """
+    global _manager
+    if _manager is None:
+        import diskcache
+        from dash import DiskcacheManager
+
+        _manager = DiskcacheManager(
+            diskcache.Cache(CALLBACK_CACHE_DIR),
+            cache_by=[data_version],
+            expire=CALLBACK_CACHE_SECONDS,
+        )
+    return _manager
+
+
+def progress(done, total):
+    """Report how far a heavy callback has got; shown on its card when it runs in the background."""
+    report = _progress.get()
+    if report is not None:
+        report([round(done / total * 100)])
+
+
+def heavy_callback(card, *dependencies, **kwargs):
+    """
+    dash.callback for a slow callback drawing into the FigureCard with id `card`.
+
+    In background mode the callback runs in a worker process: the card's spinner shows and its
+    progress bar follows progress() while the job runs, a newer request for the same callback
+    terminates the stale job (Dash does this for background callbacks), and the result lands
+    in the disk cache for later requests with the same arguments.
+    """
+    if not BACKGROUND_CALLBACKS:
+        return callback(*dependencies, **kwargs)
+
+    bar = {"type": "fig-progress", "index": card}
+    register = callback(
+        *dependencies,
+        background=True,
+        manager=manager(),
+        interval=POLL_INTERVAL_MS,
+        running=[
+            (Output({"type": "fig-spinner", "index": card}, "display"), "show", "auto"),
+            (Output(bar, "style"), {"height": "4px"}, {"display": "none"}),
+        ],
+        progress=[Output(bar, "value")],
+        progress_default=[0],
+        **kwargs,
+    )
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def with_progress(set_progress, *args):
+            token = _progress.set(set_progress)
+            try:
+                return fn(*args)
+            finally:
+                _progress.reset(token)
+
+        register(with_progress)
+        return fn
+
+    return decorator
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from data.db import get_view_version
+
+DIMENSIONS = ("gender", "age_category", "purchase_categories", "purchase_frequency", "browsing_frequency")
+MAX_SELECTIONS = 64
+
+
+class BitmapIndex:
+    """
+    One packed bitmap per value of each filter dimension. A filter is answered by
+    OR-ing the bitmaps of the chosen values within a dimension and AND-ing across
+    dimensions, without touching the frame itself.
+    """
+
+    def __init__(self, frame, dimensions=DIMENSIONS):
+        self.rows = len(frame)
+        self.bitmaps = {}
+        for dim in dimensions:
+            if dim not in frame:
+                continue
+            values = frame[dim]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype("category")
+            codes = values.cat.codes.to_numpy()
+            self.bitmaps[dim] = {
+                value: np.packbits(codes == code) for code, value in enumerate(values.cat.categories)
+            }
+        self._empty = np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+        self._selections = OrderedDict()
+        self._lock = threading.Lock()
+
+    def select(self, filters):
+        """Row positions matching the filters, or None when nothing is filtered."""
+        key = tuple(sorted(
+            (dim, frozenset(values)) for dim, values in (filters or {}).items() if values
+        ))
+        if not key:
+            return None
+        with self._lock:
+            if key in self._selections:
+                self._selections.move_to_end(key)
+                return self._selections[key]
+
+        bits = None
+        for dim, values in key:
+            dim_bits = np.bitwise_or.reduce([self.bitmaps[dim].get(v, self._empty) for v in values])
+            bits = dim_bits if bits is None else bits & dim_bits
+        positions = np.flatnonzero(np.unpackbits(bits, count=self.rows))
+
+        with self._lock:
+            self._selections[key] = positions
+            if len(self._selections) > MAX_SELECTIONS:
+                self._selections.popitem(last=False)
+        return positions
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def indexed_view(name):
+    """The named view plus a bitmap index over it, rebuilt when the data version changes."""
+    frame, version = get_view_version(name)
+    with _lock:
+        cached = _indexes.get(name)
+        if cached is None or cached[0] != version:
+            cached = (version, frame, BitmapIndex(frame))
+            _indexes[name] = cached
+    return cached[1], cached[2]
+
+
+def select_rows(name, filters):
+    """Rows of the named view matching the filters; shares the selection across callers."""
+    frame, index = indexed_view(name)
+    positions = index.select(filters)
+    return frame if positions is None else frame.iloc[positions]
@@ -0,0 +1,171 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data.db import get_tables_version
+from data.query import MemoryQuery
+
+DIMENSIONS = ["gender", "age_category", "purchase_frequency", "browsing_frequency", "review_reliability"]
+# column -> (sum, non-null count) measure names
+SUMMED = {
+    "age": ("age_sum", "age_n"),
+    "customer_reviews_importance": ("importance_sum", "importance_n"),
+}
+MAX_CATEGORIES = 64
+
+
+class Cube:
+    """
+    Customer counts and sums for every combination of DIMENSIONS plus the set of
+    purchase categories a customer picked (as a bitmask). Each customer lands in exactly
+    one cell, so cells add up: distinct customers, per-category rows and exploded row
+    counts can all be answered from the cells alone, in time proportional to the cube.
+    """
+
+    def __init__(self, cells, categories, version):
+        self.cells = cells
+        self.categories = categories
+        self.version = version
+
+    @classmethod
+    def build(cls, df, purchase_categories, version, categories=None):
+        categories = list(categories or [])
+        new = sorted(set(purchase_categories["category"].dropna()) - set(categories))
+        categories += new
+        if len(categories) > MAX_CATEGORIES:
+            raise ValueError(f"Cube supports at most {MAX_CATEGORIES} purchase categories, got {len(categories)}")
+
+        # one bit per category, OR-ed per customer (distinct powers of two, so a sum is an OR)
+        pairs = purchase_categories.dropna().drop_duplicates(["customer_id", "category"])
+        codes = pd.Categorical(pairs["category"], categories=categories).codes.astype(np.uint64)
+        bits = pd.Series(np.left_shift(np.uint64(1), codes), index=pairs.index)
+        masks = bits.groupby(pairs["customer_id"].to_numpy()).sum()
+
+        frame = df[["id"] + DIMENSIONS + list(SUMMED)].copy()
+        frame["cat_mask"] = masks.reindex(frame["id"].to_numpy(), fill_value=0).to_numpy(dtype=np.uint64)
+        # the survey keeps these in 8-bit ints, far too small for a cell's total
+        frame = frame.astype({col: "Int64" for col in SUMMED})
+        aggs = {"customers": ("id", "size")}
+        for col, (total, count) in SUMMED.items():
+            aggs[total] = (col, "sum")
+            aggs[count] = (col, "count")
+        cells = (
+            frame.groupby(DIMENSIONS + ["cat_mask"], observed=True, dropna=False)
+                 .agg(**aggs)
+                 .reset_index()
+        )
+        return cls(cells, categories, version)
+
+    def patch(self, df, purchase_categories, version):
+        """Cube with the given new customers added; cells are additive."""
+        added = Cube.build(df, purchase_categories, version, categories=self.categories)
+        cells = pd.concat([self.cells, added.cells], ignore_index=True)
+        for dim in DIMENSIONS:
+            if isinstance(added.cells[dim].dtype, pd.CategoricalDtype):
+                cells[dim] = cells[dim].astype(added.cells[dim].dtype)
+        cells = (
+            cells.groupby(DIMENSIONS + ["cat_mask"], observed=True, dropna=False)
+                 .sum()
+                 .reset_index()
+        )
+        return Cube(cells, added.categories, version)
+
+    def category_mask(self, values):
+        mask = 0
+        for value in values:
+            if value in self.categories:
+                mask |= 1 << self.categories.index(value)
+        return np.uint64(mask)
+
+
+class CubeQuery:
+    """
+    Same interface as MemoryQuery, answered from the aggregate cube.
+    Raw rows (for box plots and scatters) still come from the in-memory view.
+    """
+
+    def __init__(self, view_name, customer_view=None):
+        self.rows_query = MemoryQuery(view_name, customer_view)
+
+    def aggregate(self, by, filters=None, exploded=True, **metrics):
+        cube = get_cube()
+        cells = cube.cells
+        selected = None
+        for col, values in (filters or {}).items():
+            if not values:
+                continue
+            if col == "purchase_categories":
+                selected = cube.category_mask(values)
+                cells = cells[(cells["cat_mask"] & selected) != 0]
+            elif col in DIMENSIONS:
+                cells = cells[cells[col].isin(values)]
+            else:
+                raise ValueError(f"Cube can't filter on {col!r}")
+
+        if "purchase_categories" in by:
+            # one copy of each cell per category it contains; every customer counts once per category
+            parts = []
+            for bit, category in enumerate(cube.categories):
+                if selected is not None and not (int(selected) >> bit) & 1:
+                    continue
+                part = cells[(cells["cat_mask"] >> np.uint64(bit)) & np.uint64(1) == 1]
+                parts.append(part.assign(purchase_categories=category))
+            cells = pd.concat(parts, ignore_index=True) if parts else cells.iloc[:0].assign(purchase_categories=None)
+            cells["purchase_categories"] = pd.Categorical(
+                cells["purchase_categories"], categories=sorted(cube.categories)
+            )
+            weight = 1
+        elif exploded:
+            # rows each customer has in the exploded view; customers without categories keep one row
+            masks = cells["cat_mask"] if selected is None else cells["cat_mask"] & selected
+            weight = np.maximum(np.bitwise_count(masks.to_numpy()), 1)
+        else:
+            weight = 1
+
+        unknown = set(by) - set(DIMENSIONS) - {"purchase_categories"}
+        if unknown:
+            raise ValueError(f"Cube can't group by {sorted(unknown)}")
+
+        weighted = cells[list(by)].copy()
+        weighted["rows"] = cells["customers"] * weight if exploded else cells["customers"]
+        weighted["customers"] = cells["customers"]
+        for total, count in SUMMED.values():
+            w = weight if exploded else 1
+            weighted[total] = cells[total] * w
+            weighted[count] = cells[count] * w
+        grouped = weighted.groupby(list(by), observed=True).sum()
+
+        result = pd.DataFrame(index=grouped.index)
+        for name, (col, func) in metrics.items():
+            if func == "size" or (func == "count" and col == "id"):
+                result[name] = grouped["rows"]
+            elif func == "nunique" and col == "id":
+                result[name] = grouped["customers"]
+            elif col in SUMMED and func in ("sum", "mean"):
+                total, count = SUMMED[col]
+                result[name] = grouped[total] if func == "sum" else grouped[total] / grouped[count]
+            else:
+                raise ValueError(f"Cube can't compute {func}({col})")
+        return result.reset_index()
+
+    def rows(self, columns, filters=None, exploded=True):
+        return self.rows_query.rows(columns, filters, exploded)
+
+
+_cube = None
+_lock = threading.Lock()
+
+
+def get_cube():
+    """The cube for the current data version; patched with only the new rows when it moves on."""
+    global _cube
+    df, purchase_categories, version = get_tables_version()
+    with _lock:
+        if _cube is None:
+            _cube = Cube.build(df, purchase_categories, version)
+        elif _cube.version != version:
+            new = df[df["id"] > _cube.version]
+            new_categories = purchase_categories[purchase_categories["customer_id"] > _cube.version]
+            _cube = _cube.patch(new, new_categories, version)
+        return _cube
@@ -0,0 +1,401 @@
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+from dotenv import load_dotenv
+from pyarrow import ArrowException
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from data import schema, snapshot
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Database Configuration
+DATABASE_URL = os.getenv("DATABASE_URL")
+TABLE_NAME = "amz_customer_behavior"
+# one row per (customer, purchase category); see query_scripts/create_purchase_category_table.py
+CATEGORY_TABLE = "customer_purchase_category"
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Serve from the local snapshot only, without touching the database
+OFFLINE = os.getenv("DATA_OFFLINE", "").lower() in ("1", "true", "yes")
+
+pool_stats = {
+    "checkouts": 0,
+    "checkins": 0,
+    "connects": 0,
+    "waits": 0,
+    "wait_seconds": 0.0,
+    "overflow_peak": 0,
+}
+_stats_lock = threading.Lock()
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool that records how often a checkout had to wait for a free connection."""
+
+    def _do_get(self):
+        # no idle connection and no overflow left -> this checkout blocks
+        exhausted = self.checkedin() == 0 and self.overflow() >= MAX_OVERFLOW
+        start = time.perf_counter()
+        conn = super()._do_get()
+        if exhausted:
+            with _stats_lock:
+                pool_stats["waits"] += 1
+                pool_stats["wait_seconds"] += time.perf_counter() - start
+        return conn
+
+
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=MeteredQueuePool,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_conn, conn_record):
+    with _stats_lock:
+        pool_stats["connects"] += 1
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_conn, conn_record, conn_proxy):
+    with _stats_lock:
+        pool_stats["checkouts"] += 1
+        pool_stats["overflow_peak"] = max(pool_stats["overflow_peak"], engine.pool.overflow())
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_conn, conn_record):
+    with _stats_lock:
+        pool_stats["checkins"] += 1
+
+
+def pool_metrics():
+    pool = engine.pool
+    with _stats_lock:
+        stats = dict(pool_stats)
+    stats.update(
+        pool_size=pool.size(),
+        max_overflow=MAX_OVERFLOW,
+        checked_out=pool.checkedout(),
+        checked_in=pool.checkedin(),
+        overflow=pool.overflow(),
+    )
+    return stats
+
+
+# Load data once per process
+_df = None
+_categories = None
+_categories_from_table = False
+_last_id = 0
+_df_lock = threading.RLock()
+
+# name -> [prepare, frame]; derived frames kept in step with the base table
+_views = {}
+_listeners = []
+
+REFRESH_SECONDS = int(os.getenv("DATA_REFRESH_SECONDS", "60"))
+# the background refresher rewrites the snapshot with the appended rows at most this often
+SNAPSHOT_SECONDS = int(os.getenv("DATA_SNAPSHOT_SECONDS", "600"))
+_refresher = None
+_snapshot_saved_at = 0.0
+
+
+def read_table():
+    with SessionLocal() as session:
+        return pd.read_sql(f"SELECT * FROM {TABLE_NAME}", con=session.bind)
+
+
+def read_rows_after(last_id):
+    with SessionLocal() as session:
+        return pd.read_sql(
+            text(f"SELECT * FROM {TABLE_NAME} WHERE id > :last_id ORDER BY id"),
+            con=session.bind,
+            params={"last_id": last_id},
+        )
+
+
+def has_category_table():
+    return inspect(engine).has_table(CATEGORY_TABLE)
+
+
+def read_categories(after_id=None):
+    sql, params = f"SELECT customer_id, category FROM {CATEGORY_TABLE}", {}
+    if after_id is not None:
+        sql, params = sql + " WHERE customer_id > :after_id", {"after_id": after_id}
+    with SessionLocal() as session:
+        return pd.read_sql(text(sql + " ORDER BY customer_id"), con=session.bind, params=params)
+
+
+def split_categories(df):
+    """Fallback for databases without the category table: parse the delimited column once."""
+    cats = df[["id", "purchase_categories"]].dropna()
+    cats = cats.assign(category=cats["purchase_categories"].str.split(r"[;,]", regex=True)).explode("category")
+    cats["category"] = cats["category"].str.strip()
+    cats = cats[cats["category"] != ""]
+    return cats.rename(columns={"id": "customer_id"})[["customer_id", "category"]].reset_index(drop=True)
+
+
+def read_version():
+    """Cheap fingerprint of the tables: max(id), row count and category row count."""
+    with engine.connect() as conn:
+        max_id, rows = conn.execute(text(f"SELECT MAX(id), COUNT(*) FROM {TABLE_NAME}")).one()
+        version = f"{max_id or 0}-{rows}"
+        if has_category_table():
+            version += f"-{conn.execute(text(f'SELECT COUNT(*) FROM {CATEGORY_TABLE}')).scalar()}"
+    return version
+
+
+def snapshot_version(df, categories=None):
+    """The version read_version() gives for a database holding exactly these rows."""
+    version = f"{int(df['id'].max()) if len(df) else 0}-{len(df)}"
+    if categories is not None:
+        version += f"-{len(categories)}"
+    return version
+
+
+def save_snapshot(df, categories=None):
+    version = snapshot_version(df, categories)
+    try:
+        snapshot.write_snapshot(TABLE_NAME, df, version)
+        if categories is not None:
+            snapshot.write_snapshot(CATEGORY_TABLE, categories, version)
+    except OSError:
+        logger.exception("Could not write snapshot to %s", snapshot.SNAPSHOT_DIR)
+
+
+def encode_table(df):
+    """Survey rows in the schema's compact dtypes, with age_category derived from age."""
+    return schema.with_age_category(schema.encode(df))
+
+
+def read_snapshots():
+    df = encode_table(snapshot.read_snapshot(TABLE_NAME))
+    if snapshot.read_version(CATEGORY_TABLE) == snapshot.read_version(TABLE_NAME):
+        return df, schema.encode(snapshot.read_snapshot(CATEGORY_TABLE), schema.CATEGORY_SCHEMA)
+    return df, None
+
+
+def load_table():
+    """
+    Load the table and its purchase categories from the snapshot when it matches
+    the database, else from Postgres. Categories are None if there is no category table.
+    """
+    cached_version = snapshot.read_version(TABLE_NAME)
+    if OFFLINE:
+        if cached_version is None:
+            raise RuntimeError("DATA_OFFLINE is set but there is no snapshot in " + snapshot.SNAPSHOT_DIR)
+        return read_snapshots()
+
+    try:
+        version = read_version()
+    except SQLAlchemyError:
+        if cached_version is None:
+            raise
+        logger.warning("Database unreachable, serving snapshot version %s", cached_version)
+        return read_snapshots()
+
+    if version == cached_version:
+        try:
+            return read_snapshots()
+        except (ArrowException, OSError):
+            # e.g. truncated by a crash; the database still has everything
+            logger.exception("Could not read the snapshot in %s, loading from the database", snapshot.SNAPSHOT_DIR)
+
+    df = encode_table(read_table())
+    categories = schema.encode(read_categories(), schema.CATEGORY_SCHEMA) if has_category_table() else None
+    save_snapshot(df, categories)
+    return df, categories
+
+
+def _ensure_loaded():
+    global _df, _categories, _categories_from_table, _last_id
+    with _df_lock:
+        if _df is None:
+            _df, _categories = load_table()
+            _categories_from_table = _categories is not None
+            if _categories is None:
+                logger.warning("No %s table, parsing purchase_categories instead", CATEGORY_TABLE)
+                _categories = schema.encode(split_categories(_df), schema.CATEGORY_SCHEMA)
+            _last_id = int(_df["id"].max()) if len(_df) else 0
+
+
+def categories_from_table():
+    """
+    Whether purchase categories come from the category table. Looked up at load, and again on
+    every call while the table is missing, so query_scripts.create_purchase_category_table can
+    run while the app is up: from then on refresh() reads new rows' categories from the table.
+    """
+    global _categories_from_table
+    with _df_lock:
+        _ensure_loaded()
+        if _categories_from_table:
+            return True
+    if not has_category_table():
+        return False
+    with _df_lock:
+        _categories_from_table = True
+    return True
+
+
+def get_customer_behavior():
+    """A copy of the amz_customer_behavior frame, safe for the caller to modify."""
+    with _df_lock:
+        _ensure_loaded()
+        return _df.copy()
+
+
+def get_purchase_categories():
+    """A copy of the (customer_id, category) frame, one row per purchase category of each customer."""
+    with _df_lock:
+        _ensure_loaded()
+        return _categories.copy()
+
+
+def data_version():
+    """Highest id loaded so far. Only grows, and matches across worker processes."""
+    with _df_lock:
+        _ensure_loaded()
+        return _last_id
+
+
+def register_view(name, prepare):
+    """
+    Keep a derived frame (e.g. the Dashboard's exploded table) in step with the base table.
+    prepare(rows) maps raw rows to view rows; refresh() runs it on new rows only.
+    """
+    with _df_lock:
+        if name not in _views:
+            _views[name] = [prepare, prepare(get_customer_behavior())]
+        return _views[name][1].copy()
+
+
+def get_view(name):
+    with _df_lock:
+        return _views[name][1].copy()
+
+
+# The two readers below run on every callback, so they hand out shallow copies of the shared
+# frames instead: adding or dropping columns stays local, but their values must not be modified.
+
+def get_tables_version():
+    """Base table, purchase categories and data version, read atomically. Read-only, see above."""
+    with _df_lock:
+        _ensure_loaded()
+        return _df.copy(deep=False), _categories.copy(deep=False), _last_id
+
+
+def get_view_version(name):
+    """A view together with the data version it reflects, read atomically. Read-only, see above."""
+    with _df_lock:
+        return _views[name][1].copy(deep=False), _last_id
+
+
+def memory_report():
+    """Per-column bytes of every shared frame in this process, compact vs. plain objects."""
+    with _df_lock:
+        _ensure_loaded()
+        frames = {TABLE_NAME: _df, CATEGORY_TABLE: _categories}
+        frames.update({f"view:{name}": view[1] for name, view in _views.items()})
+    return schema.memory_report(frames)
+
+
+def on_refresh(listener):
+    """Call listener(new_rows) after every refresh that found new rows."""
+    _listeners.append(listener)
+
+
+def refresh():
+    """
+    Append rows inserted since the last load. Never reloads the whole table, and leaves the
+    snapshot to the background refresher (see save_snapshot_if_due).
+    """
+    global _df, _categories, _last_id
+    with _df_lock:
+        _ensure_loaded()
+        last_id = _last_id
+
+    new = read_rows_after(last_id)
+    if new.empty:
+        return 0
+    # rows and their categories are inserted in one transaction, so both are complete here
+    new = encode_table(new)
+    new_categories = read_categories(after_id=last_id) if _categories_from_table else split_categories(new)
+    new_categories = schema.encode(new_categories, schema.CATEGORY_SCHEMA)
+
+    with _df_lock:
+        # another thread may have appended some of these already
+        new = new[new["id"] > _last_id]
+        if new.empty:
+            return 0
+        # continue the base frame's positions so view rows point back at base rows
+        new.index = pd.RangeIndex(len(_df), len(_df) + len(new))
+        _df, new = schema.align(_df, new)
+        _df = pd.concat([_df, new])
+        new_categories = new_categories[new_categories["customer_id"].isin(new["id"])]
+        _categories, new_categories = schema.align(_categories, new_categories)
+        _categories = pd.concat([_categories, new_categories], ignore_index=True)
+        for view in _views.values():
+            view[1], rows = schema.align(view[1], view[0](new.copy(deep=False)))
+            view[1] = pd.concat([view[1], rows])
+        _last_id = int(new["id"].max())
+
+    for listener in _listeners:
+        listener(new)
+    return len(new)
+
+
+def save_snapshot_if_due():
+    """
+    Rewrite the snapshot with the rows appended since it was written, at most every
+    SNAPSHOT_SECONDS, and not if another worker already wrote this version.
+    """
+    global _snapshot_saved_at
+    if time.monotonic() - _snapshot_saved_at < SNAPSHOT_SECONDS:
+        return
+    with _df_lock:
+        _ensure_loaded()
+        df, categories = _df, _categories if _categories_from_table else None
+    _snapshot_saved_at = time.monotonic()
+    if snapshot.read_version(TABLE_NAME) != snapshot_version(df, categories):
+        save_snapshot(df, categories)
+
+
+def _refresh_loop():
+    while True:
+        time.sleep(REFRESH_SECONDS)
+        # never let an error end the thread: the data would go stale until a restart
+        try:
+            refresh()
+            save_snapshot_if_due()
+        except SQLAlchemyError:
+            logger.warning("Background refresh failed, will retry", exc_info=True)
+        except Exception:
+            logger.exception("Background refresh failed, will retry")
+
+
+def start_refresher():
+    """Poll for new rows every DATA_REFRESH_SECONDS in a daemon thread (0 disables)."""
+    global _refresher
+    if OFFLINE or REFRESH_SECONDS <= 0 or _refresher is not None:
+        return
+    _refresher = threading.Thread(target=_refresh_loop, name="data-refresher", daemon=True)
+    _refresher.start()
@@ -0,0 +1,143 @@
+import networkx as nx
+import numpy as np
+
+# Force-directed layout engines for the Network page. Each takes a warm-start position array
+# (n x 2, NaN rows for nodes without a position yet), the edges as an m x 2 array of node
+# numbers with their weights, and returns the new n x 2 positions. `seed` fixes where nodes
+# without a position start, so the same input always gives the same layout.
+
+# Above this many nodes repulsion comes from a grid of cells instead of every pair of nodes
+GRID_THRESHOLD = 500
+# networkx's early stop: mean step per node below this ends the iterations
+THRESHOLD = 1e-4
+
+
+def _start(xy, seed):
+    """Positions with NaN rows filled in at random, the way spring_layout fills in missing nodes."""
+    xy = np.array(xy, dtype=np.float64).reshape(-1, 2)
+    missing = np.isnan(xy).any(axis=1)
+    if missing.any():
+        rng = np.random.default_rng(seed)
+        size = np.nanmax(xy[~missing]) if (~missing).any() else 1
+        xy[missing] = rng.random((missing.sum(), 2)) * (size or 1)
+    return xy
+
+
+def _repulsion(xy, k):
+    """Repulsion k^2 / d on every node from every other node."""
+    dx = xy[:, 0, None] - xy[None, :, 0]
+    dy = xy[:, 1, None] - xy[None, :, 1]
+    push = k * k / np.maximum(dx * dx + dy * dy, 1e-4)
+    return np.column_stack([(dx * push).sum(axis=1), (dy * push).sum(axis=1)])
+
+
+def _pairs_between(cell_of, starts, ends, order, offset, size):
+    """(i, j) for every node i and every node j in the cell `offset` away from i's."""
+    neighbour = cell_of + offset
+    inside = ((neighbour >= 0) & (neighbour < size)).all(axis=1)
+    cell = np.where(inside, neighbour[:, 0] * size + neighbour[:, 1], 0)
+    lengths = np.where(inside, ends[cell] - starts[cell], 0)
+    i = np.repeat(np.arange(len(cell_of)), lengths)
+    within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    j = order[np.repeat(starts[cell], lengths) + within]
+    return i, j
+
+
+def _grid_repulsion(xy, k):
+    """
+    Repulsion from a grid of cells, a one-level Barnes-Hut: exact between nodes in the same or
+    neighbouring cells, and from each farther cell's centre of mass, weighted by its node count.
+    """
+    n = len(xy)
+    size = max(int(round(2 * n ** 0.25)), 1)
+    low = xy.min(axis=0)
+    span = np.maximum(xy.max(axis=0) - low, 1e-9)
+    cell_of = np.minimum(((xy - low) / span * size).astype(int), size - 1)
+    cell = cell_of[:, 0] * size + cell_of[:, 1]
+
+    counts = np.bincount(cell, minlength=size * size)
+    occupied = np.flatnonzero(counts)
+    centre = np.column_stack([
+        np.bincount(cell, xy[:, 0], size * size)[occupied],
+        np.bincount(cell, xy[:, 1], size * size)[occupied],
+    ]) / counts[occupied, None]
+    occupied_at = np.column_stack([occupied // size, occupied % size])
+
+    # far field: centres of mass of the cells that aren't next to the node's own
+    dx = xy[:, 0, None] - centre[None, :, 0]
+    dy = xy[:, 1, None] - centre[None, :, 1]
+    near = (np.abs(cell_of[:, None, :] - occupied_at[None, :, :]) <= 1).all(axis=-1)
+    push = np.where(near, 0, counts[occupied] * k * k / np.maximum(dx * dx + dy * dy, 1e-4))
+    force = np.column_stack([(dx * push).sum(axis=1), (dy * push).sum(axis=1)])
+
+    # near field: every pair of nodes in neighbouring cells
+    order = np.argsort(cell, kind="stable")
+    starts = np.searchsorted(cell[order], np.arange(size * size), side="left")
+    ends = np.searchsorted(cell[order], np.arange(size * size), side="right")
+    for offset in np.array([(a, b) for a in (-1, 0, 1) for b in (-1, 0, 1)]):
+        i, j = _pairs_between(cell_of, starts, ends, order, offset, size)
+        i, j = i[i != j], j[i != j]
+        dx, dy = xy[i, 0] - xy[j, 0], xy[i, 1] - xy[j, 1]
+        push = k * k / np.maximum(dx * dx + dy * dy, 1e-4)
+        force[:, 0] += np.bincount(i, dx * push, n)
+        force[:, 1] += np.bincount(i, dy * push, n)
+    return force
+
+
+def fruchterman_reingold(xy, edges, weights, k=None, iterations=50, seed=None):
+    """
+    Vectorized Fruchterman-Reingold with networkx.spring_layout's cooling, step size, early stop
+    and rescaling, so it lays out the same graph the same way, but without building a graph or
+    a dense adjacency matrix on every call. Attraction runs over the edge list; repulsion is
+    exact up to GRID_THRESHOLD nodes and from a grid above it.
+    """
+    xy = _start(xy, seed)
+    n = len(xy)
+    if n <= 1:
+        return np.zeros((n, 2))
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    weights = np.asarray(weights, dtype=np.float64)
+    k = np.sqrt(1.0 / n) if k is None else k
+    repulsion = _repulsion if n <= GRID_THRESHOLD else _grid_repulsion
+
+    t = max(np.ptp(xy[:, 0]), np.ptp(xy[:, 1])) * 0.1
+    dt = t / (iterations + 1)
+    u, v = edges[:, 0], edges[:, 1]
+    for _ in range(iterations):
+        displacement = repulsion(xy, k)
+        # attraction d^2 / k along each edge, times its weight
+        delta = xy[u] - xy[v]
+        distance = np.maximum(np.linalg.norm(delta, axis=-1), 0.01)
+        pull = delta * (weights * distance / k)[:, None]
+        for axis in (0, 1):
+            displacement[:, axis] += np.bincount(v, pull[:, axis], n) - np.bincount(u, pull[:, axis], n)
+
+        length = np.linalg.norm(displacement, axis=-1)
+        length = np.where(length < 0.01, 0.1, length)
+        step = displacement * (t / length)[:, None]
+        xy += step
+        t -= dt
+        if np.linalg.norm(step) / n < THRESHOLD:
+            break
+
+    # centre and scale into [-1, 1], like spring_layout's rescale_layout
+    xy -= xy.mean(axis=0)
+    limit = np.abs(xy).max()
+    return xy / limit if limit > 0 else xy
+
+
+def networkx_layout(xy, edges, weights, k=None, iterations=50, seed=None):
+    """networkx.spring_layout on a graph built from the arrays; the reference the other engine follows."""
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    G = nx.Graph()
+    G.add_nodes_from(range(len(xy)))
+    G.add_weighted_edges_from((int(a), int(b), float(w)) for (a, b), w in zip(edges, weights))
+    pos = {i: p for i, p in enumerate(xy) if not np.isnan(p).any()}
+    pos = nx.spring_layout(G, pos=pos or None, weight="weight", k=k, iterations=iterations, seed=seed)
+    return np.array([pos[i] for i in range(len(xy))], dtype=np.float64).reshape(-1, 2)
+
+
+LAYOUT_ENGINES = {
+    "numpy": fruchterman_reingold,
+    "networkx": networkx_layout,
+}
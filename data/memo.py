@@ -0,0 +1,136 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import plotly.io as pio
+from plotly.basedatatypes import BaseFigure
+
+from data.db import data_version
+
+# Per-callback result cache: at most MEMO_SIZE entries, each valid for MEMO_TTL_SECONDS
+MEMO_SIZE = int(os.getenv("DASHBOARD_MEMO_SIZE", "128"))
+MEMO_TTL_SECONDS = float(os.getenv("DASHBOARD_MEMO_TTL_SECONDS", "300"))
+
+_caches = {}
+
+
+def normalize(value):
+    """Filter values as an order-independent key; an empty selection means the same as none."""
+    if value is None:
+        return ()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(set(value), key=str))
+    return value
+
+
+def _payload(value):
+    """A value with its Plotly figures (also inside dicts, e.g. dcc.Store data) as JSON payloads."""
+    if isinstance(value, BaseFigure):
+        payload = pio.to_json(value, validate=False)
+        return json.loads(payload), len(payload)
+    if isinstance(value, dict):
+        out, size = {}, 0
+        for key, item in value.items():
+            out[key], item_size = _payload(item)
+            size += item_size
+        return out, size
+    return value, 0
+
+
+def serialize(result):
+    """
+    Swap every Plotly figure in a callback result for its JSON payload, as plain dicts and lists.
+    Dash encodes those directly, so a cached figure is neither rebuilt nor walked by the
+    Plotly encoder again. Returns the result and the payload size in bytes.
+    """
+    values = result if isinstance(result, tuple) else (result,)
+    out, size = [], 0
+    for value in values:
+        value, value_size = _payload(value)
+        size += value_size
+        out.append(value)
+    return (tuple(out) if isinstance(result, tuple) else out[0]), size
+
+
+class Memo:
+    def __init__(self, name, maxsize, ttl):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, result, payload bytes)
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, result, size):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, result, size)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "bytes": sum(entry[2] for entry in self.entries.values()),
+            }
+
+
+def memoize(fn=None, maxsize=None, ttl=None):
+    """
+    Cache a callback's return value by its normalized arguments and the current data version,
+    so flipping back to a filter combination that was already drawn skips the work.
+    Figures are kept as serialized payloads (see serialize). Exceptions such as
+    PreventUpdate are never cached.
+    """
+    if fn is None:
+        return functools.partial(memoize, maxsize=maxsize, ttl=ttl)
+
+    memo = _caches[fn.__name__] = Memo(
+        fn.__name__,
+        MEMO_SIZE if maxsize is None else maxsize,
+        MEMO_TTL_SECONDS if ttl is None else ttl,
+    )
+
+    @functools.wraps(fn)
+    def wrapper(*args):
+        if memo.maxsize <= 0:
+            return fn(*args)
+        key = (data_version(),) + tuple(normalize(arg) for arg in args)
+        entry = memo.get(key)
+        if entry is not None:
+            return entry[1]
+        result, size = serialize(fn(*args))
+        memo.put(key, result, size)
+        return result
+
+    wrapper.memo = memo
+    return wrapper
+
+
+def memo_stats():
+    return {name: memo.stats() for name, memo in _caches.items()}
@@ -0,0 +1,386 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from data import snapshot
+from data.db import data_version, get_tables_version
+from data.force_layout import LAYOUT_ENGINES
+
+logger = logging.getLogger(__name__)
+
+# Precomputed animation of the Network page, written by `python -m query_scripts.build_network`
+# so app workers load it instead of laying out every record at startup
+NETWORK_ARTIFACT = os.getenv("NETWORK_ARTIFACT", os.path.join(snapshot.SNAPSHOT_DIR, "network.npz"))
+
+# One-hot encoding: one column per attribute value, one row per record
+ATTRIBUTES = [("purchase_frequency", "Purchase"), ("browsing_frequency", "Browse"), ("gender", "Gender")]
+
+# The graph, node scores and positions carry over from one record to the next: a record only
+# bumps the weights of its own pairs, and each layout starts from the previous frame's positions,
+# so a few iterations are enough and nodes don't jump between frames.
+LAYOUT_SEED = 42
+FIRST_ITERATIONS = 50
+WARM_ITERATIONS = 2
+# force-directed layout engine, a key of data.force_layout.LAYOUT_ENGINES
+LAYOUT_ENGINE = os.getenv("NETWORK_LAYOUT_ENGINE", "numpy")
+# records per segment when a build lays them out in a process pool
+SEGMENT_RECORDS = 250
+
+
+def one_hot(rows):
+    """Sparse records x attributes matrix with a 1 for every attribute a record has, and the attribute labels."""
+    blocks, labels = [], []
+    for column, prefix in ATTRIBUTES:
+        codes, values = pd.factorize(rows[column])
+        present = np.flatnonzero(codes >= 0)
+        blocks.append(sparse.csr_matrix(
+            (np.ones(len(present), dtype=np.int32), (present, codes[present])), shape=(len(rows), len(values))
+        ))
+        labels += [f"{prefix}: {value}" for value in values]
+    return sparse.hstack(blocks, format="csr"), labels
+
+
+def cooccurrence(onehot):
+    """
+    Attribute pairs seen together (u < v), from the upper triangle of X^T X, and a records x pairs
+    matrix with a 1 where a record has both. Pairs are ordered by the first record having them.
+    """
+    counts = sparse.triu(onehot.T @ onehot, k=1).tocoo()
+    hits = onehot[:, counts.row].multiply(onehot[:, counts.col]).tocsc()
+    first = np.asarray(hits.argmax(axis=0)).ravel()
+    order = np.lexsort((counts.col, counts.row, first))
+    return counts.row[order], counts.col[order], hits[:, order]
+
+
+def place(xy, node, edges, rng):
+    """Start a new node next to the neighbours it already has, or anywhere if it has none yet."""
+    ends = edges[(edges == node).any(axis=1)].ravel()
+    near = ends[(ends != node) & (ends < len(xy))]
+    if not len(near):
+        return rng.uniform(-1, 1, 2)
+    # random offset, so new nodes never start on one line with their neighbours
+    return xy[near].mean(axis=0) + rng.normal(0, 0.1, 2)
+
+
+def lay_out(xy, edges, weights, seen, engine, rng, warm_iterations=WARM_ITERATIONS):
+    """
+    Positions after each record, each layout warm-started from the one before, beginning at xy.
+    Record r has the first seen[r] edges with weights[r]; nodes are numbered in order of first
+    appearance, so its nodes are those up to the highest one on those edges.
+    """
+    layout = LAYOUT_ENGINES[engine]
+    out = []
+    for r in range(len(seen)):
+        active = edges[:seen[r]]
+        nodes = active.max() + 1
+        new = nodes - len(xy)
+        for node in range(len(xy), nodes):
+            xy = np.vstack([xy, place(xy, node, active, rng)])
+        xy = layout(
+            xy, active, weights[r, :seen[r]], k=0.5, seed=LAYOUT_SEED,
+            iterations=FIRST_ITERATIONS if new == nodes else warm_iterations,
+        )
+        out.append(xy)
+    return out
+
+
+def _lay_out_segment(args):
+    xy, edges, weights, seen, engine, segment = args
+    return lay_out(xy, edges, weights, seen, engine, np.random.default_rng((LAYOUT_SEED, segment)))
+
+
+class Network:
+    """
+    Co-occurrence graph of the survey's attributes, laid out after every record.
+
+    snapshots holds one (positions, edge weights, node scores) tuple per frame, frame 0 being
+    the blank one; nodes and edges are in order of first appearance, so a frame's arrays cover
+    the first len(...) of them. version is the highest row id laid out.
+    """
+
+    def __init__(self, engine=LAYOUT_ENGINE):
+        self.version = 0
+        self.engine = engine
+        # positions of the nodes laid out so far, in node order
+        self.xy = np.zeros((0, 2))
+        self.nodes, self.node_index = [], {}
+        self.edges, self.edge_index = [], {}
+        # co-occurrence totals so far
+        self.weight = np.zeros(0, dtype=np.int32)
+        self.snapshots = [None]
+        self.bounds = [-1, 1, -1, 1]
+        self.rng = np.random.default_rng(LAYOUT_SEED)
+
+    @classmethod
+    def build(cls, df, version, engine=LAYOUT_ENGINE, workers=1):
+        network = cls(engine)
+        network.add_records(df, workers)
+        network.version = version
+        return network
+
+    def add_records(self, rows, workers=1):
+        """
+        Append one frame per row: co-occurrence counts come from prefix sums, only the layout runs
+        per record. With workers > 1 the layouts run in a process pool (see _lay_out_parallel).
+        """
+        if rows.empty:
+            return
+        onehot, labels = one_hot(rows[[column for column, _ in ATTRIBUTES]])
+        u, v, hits = cooccurrence(onehot)
+
+        # pairs as global edge numbers, new ones numbered in order of first appearance
+        pairs = []
+        for a, b in zip(u, v):
+            pair = tuple(sorted((labels[a], labels[b])))
+            if pair not in self.edge_index:
+                self.edge_index[pair] = len(self.edges)
+                self.edges.append(pair)
+                for node in pair:
+                    if node not in self.node_index:
+                        self.node_index[node] = len(self.nodes)
+                        self.nodes.append(node)
+            pairs.append(self.edge_index[pair])
+
+        # cumulative weight of every edge after each record, and node scores (the total weight of
+        # their edges) through the edges x nodes incidence matrix
+        hits = hits.tocsr()
+        added = sparse.csr_matrix(
+            (hits.data, np.asarray(pairs, dtype=np.int64)[hits.indices], hits.indptr),
+            shape=(len(rows), len(self.edges)),
+        )
+        added.sort_indices()
+        weights = np.cumsum(added.toarray(), axis=0, dtype=np.int32)
+        weights += np.pad(self.weight, (0, len(self.edges) - len(self.weight)))
+        edges = np.array([[self.node_index[a], self.node_index[b]] for a, b in self.edges]).reshape(-1, 2)
+        incidence = sparse.csr_matrix(
+            (np.ones(2 * len(edges), dtype=np.int32), (np.repeat(np.arange(len(edges)), 2), edges.ravel())),
+            shape=(len(self.edges), len(self.nodes)),
+        )
+        scores = (incidence.T @ weights.T).T
+
+        # records that change the graph, and how many edges exist after each of them
+        changed = np.flatnonzero(np.diff(added.indptr))
+        last_edge = added.indices[added.indptr[changed + 1] - 1]
+        seen = np.maximum.accumulate(np.maximum(last_edge + 1, len(self.weight)))
+
+        if workers > 1 and len(changed) > 2 * SEGMENT_RECORDS:
+            layouts = self._lay_out_parallel(edges, weights[changed], seen, workers)
+        else:
+            layouts = lay_out(self.xy, edges, weights[changed], seen, self.engine, self.rng)
+
+        j = 0
+        for r in range(len(rows)):
+            if added.indptr[r + 1] == added.indptr[r]:
+                # nothing changed, show the previous frame again
+                self.snapshots.append(self.snapshots[-1])
+                continue
+            self.xy = layouts[j]
+            xy = self.xy.astype(np.float32)
+            # optional zoom bounds
+            self.bounds = [float(xy[:, 0].min())-1, float(xy[:, 0].max())+1,
+                           float(xy[:, 1].min())-1, float(xy[:, 1].max())+1]
+            self.snapshots.append((xy, weights[r, :seen[j]], scores[r, :len(xy)]))
+            j += 1
+
+        self.weight = weights[-1]
+
+    def _lay_out_parallel(self, edges, weights, seen, workers):
+        """
+        Layouts of the changed records in a process pool. Warm starts chain every record to the one
+        before, so the records are cut into segments of SEGMENT_RECORDS: the first record of each
+        segment is laid out here, warm-started from the previous segment's first record, and each
+        segment's other records are then independent of the rest and run in a worker, warm-started
+        from their segment's first record. The result depends on SEGMENT_RECORDS but not on the
+        number of workers, and differs slightly from a sequential build.
+        """
+        starts = list(range(0, len(seen), SEGMENT_RECORDS))
+        heads, xy = [], self.xy
+        for i, start in enumerate(starts):
+            # as many iterations as the records in between would have had, up to a cold start's
+            gap = start - starts[i - 1] if i else 1
+            xy = lay_out(xy, edges, weights[start:start + 1], seen[start:start + 1], self.engine, self.rng,
+                         warm_iterations=min(WARM_ITERATIONS * gap, FIRST_ITERATIONS))[0]
+            heads.append(xy)
+
+        jobs = [
+            (heads[i], edges, weights[start + 1:start + SEGMENT_RECORDS], seen[start + 1:start + SEGMENT_RECORDS],
+             self.engine, i)
+            for i, start in enumerate(starts)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            segments = list(pool.map(_lay_out_segment, jobs))
+        return [xy for head, segment in zip(heads, segments) for xy in [head, *segment]]
+
+    def save(self, path=NETWORK_ARTIFACT):
+        """
+        Write the frames as padded float32/int32 arrays to a compressed .npz, together with the
+        exact layout state (positions, random generator) so loading it can carry on with new rows.
+        """
+        distinct, frame_snapshot, seen = [], [], {}
+        for snap in self.snapshots:
+            if snap is None:
+                frame_snapshot.append(-1)
+                continue
+            if id(snap) not in seen:
+                seen[id(snap)] = len(distinct)
+                distinct.append(snap)
+            frame_snapshot.append(seen[id(snap)])
+
+        positions = np.zeros((len(distinct), len(self.nodes), 2), dtype=np.float32)
+        weights = np.zeros((len(distinct), len(self.edges)), dtype=np.int32)
+        scores = np.zeros((len(distinct), len(self.nodes)), dtype=np.int32)
+        node_counts = np.array([len(xy) for xy, _, _ in distinct], dtype=np.int32)
+        edge_counts = np.array([len(w) for _, w, _ in distinct], dtype=np.int32)
+        for i, (xy, w, s) in enumerate(distinct):
+            positions[i, :len(xy)] = xy
+            weights[i, :len(w)] = w
+            scores[i, :len(s)] = s
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # write to a temp file of this writer's own first, so a crash or another worker
+        # catching up at the same time never leaves a half-written artifact
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".npz.tmp")
+        try:
+            with open(fd, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    version=np.int64(self.version),
+                    engine=np.array(self.engine),
+                    nodes=np.array(self.nodes, dtype=str),
+                    edges=np.array([[self.node_index[u], self.node_index[v]] for u, v in self.edges],
+                                   dtype=np.int32).reshape(-1, 2),
+                    frame_snapshot=np.array(frame_snapshot, dtype=np.int32),
+                    positions=positions, node_counts=node_counts,
+                    weights=weights, edge_counts=edge_counts, scores=scores,
+                    bounds=np.array(self.bounds, dtype=np.float64),
+                    pos=self.xy,
+                    rng=np.array(json.dumps(self.rng.bit_generator.state)),
+                )
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path=NETWORK_ARTIFACT):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+
+        network = cls(str(arrays["engine"]))
+        network.version = int(arrays["version"])
+        network.nodes = [str(node) for node in arrays["nodes"]]
+        network.node_index = {node: i for i, node in enumerate(network.nodes)}
+        network.edges = [(network.nodes[u], network.nodes[v]) for u, v in arrays["edges"]]
+        network.edge_index = {pair: i for i, pair in enumerate(network.edges)}
+
+        distinct = [
+            (arrays["positions"][i, :n], arrays["weights"][i, :e], arrays["scores"][i, :n])
+            for i, (n, e) in enumerate(zip(arrays["node_counts"], arrays["edge_counts"]))
+        ]
+        network.snapshots = [None if i < 0 else distinct[i] for i in arrays["frame_snapshot"]]
+        if distinct:
+            network.weight = arrays["weights"][-1].copy()
+
+        # layout state exactly as the build left it
+        network.xy = arrays["pos"]
+        network.rng.bit_generator.state = json.loads(str(arrays["rng"]))
+        network.bounds = arrays["bounds"].tolist()
+        return network
+
+
+_network = None
+_builder = None
+_lock = threading.Lock()
+
+
+def build_network(path=NETWORK_ARTIFACT, engine=LAYOUT_ENGINE, workers=1):
+    """Lay out every record of the current table and write the artifact. Returns the Network."""
+    df, _, version = get_tables_version()
+    network = Network.build(df, version, engine, workers)
+    network.save(path)
+    return network
+
+
+def _load():
+    """
+    The artifact's network, or None if it is missing, unreadable or was built from other data.
+    One laid out by another engine is still returned, to be served until get_network replaces it.
+    """
+    if not os.path.exists(NETWORK_ARTIFACT):
+        logger.warning("No Network artifact at %s, laying out every record in the background "
+                       "(python -m query_scripts.build_network builds it ahead of time)", NETWORK_ARTIFACT)
+        return None
+    try:
+        network = Network.load()
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        logger.exception("Could not read %s, rebuilding it in the background", NETWORK_ARTIFACT)
+        return None
+    # an artifact ahead of the table was built from other data
+    if network.version > data_version():
+        logger.warning("%s is ahead of the table, rebuilding it in the background", NETWORK_ARTIFACT)
+        return None
+    if network.engine != LAYOUT_ENGINE:
+        logger.warning("%s was laid out by %s, serving it while it is rebuilt with %s in the background",
+                       NETWORK_ARTIFACT, network.engine, LAYOUT_ENGINE)
+    return network
+
+
+def _catch_up(network):
+    """Lay out the rows added since the network was built, then rewrite the artifact."""
+    df, _, version = get_tables_version()
+    start = time.perf_counter()
+    network.add_records(df[df["id"] > network.version])
+    network.version = version
+    try:
+        network.save()
+    except OSError:
+        logger.exception("Could not write %s", NETWORK_ARTIFACT)
+    logger.info("Network caught up to version %s in %.1fs", version, time.perf_counter() - start)
+
+
+def _rebuild():
+    """Lay out every record with LAYOUT_ENGINE, write the artifact, then serve the new network."""
+    global _network
+    network = Network()
+    _catch_up(network)
+    with _lock:
+        _network = network
+
+
+def get_network():
+    """
+    The Network page's animation, loaded from the artifact on first use. When the data version
+    moves on, the new rows are laid out in a background thread and the artifact rewritten; the
+    frames already there are served meanwhile. Without a usable artifact that thread lays out
+    every record, starting from an empty network (see building()); one laid out by another
+    engine is served until the thread has replaced it.
+    """
+    global _network, _builder
+    version = data_version()
+    with _lock:
+        if _network is None:
+            _network = _load() or Network()
+        if _builder is None or not _builder.is_alive():
+            if _network.engine != LAYOUT_ENGINE:
+                _builder = threading.Thread(target=_rebuild, name="network-builder", daemon=True)
+                _builder.start()
+            elif _network.version != version:
+                _builder = threading.Thread(target=_catch_up, args=(_network,), name="network-builder", daemon=True)
+                _builder.start()
+        return _network
+
+
+def building():
+    """True while the background thread lays out a network that has no frames yet."""
+    with _lock:
+        return (_network is not None and len(_network.snapshots) <= 1
+                and _builder is not None and _builder.is_alive())
@@ -0,0 +1,154 @@
+import os
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+
+from data import schema
+from data.bitmap import indexed_view, select_rows
+from data.db import CATEGORY_TABLE, TABLE_NAME, engine
+
+# "cube" answers from the precomputed aggregate cube, "memory" filters and groups the cached
+# frame in pandas, "sql" pushes both down to the database
+QUERY_MODE = os.getenv("DASHBOARD_QUERY_MODE", "cube").lower()
+
+FILTER_COLUMNS = ("gender", "age_category", "purchase_categories", "purchase_frequency", "browsing_frequency")
+COLUMNS = FILTER_COLUMNS + (
+    "id", "age", "customer_reviews_importance", "review_reliability",
+)
+AGG_SQL = {
+    "size": "COUNT(*)",
+    "count": "COUNT({col})",
+    "nunique": "COUNT(DISTINCT {col})",
+    "mean": "AVG({col})",
+    "sum": "SUM({col})",
+}
+
+
+def _check_columns(columns):
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown column(s): {sorted(unknown)}")
+
+
+class MemoryQuery:
+    """
+    Filters and aggregates over an in-memory view.
+    exploded=True works on one row per (customer, purchase category);
+    exploded=False keeps one row per customer that matches the filters, read from
+    customer_view when there is one (its rows are addressed by the view's customer_row).
+    """
+
+    def __init__(self, view_name, customer_view=None):
+        self.view_name = view_name
+        self.customer_view = customer_view
+
+    def _filtered(self, filters, exploded):
+        _check_columns(list(filters or {}))
+        if exploded:
+            return select_rows(self.view_name, filters)
+        if self.customer_view is None:
+            return select_rows(self.view_name, filters).drop_duplicates(subset="id")
+        if not (filters or {}).get("purchase_categories"):
+            return select_rows(self.customer_view, filters)
+        # category filters need the exploded rows; map the matches back to customer offsets
+        customers, _ = indexed_view(self.customer_view)
+        matches = select_rows(self.view_name, filters)["customer_row"].to_numpy()
+        return customers.iloc[np.unique(matches)]
+
+    def aggregate(self, by, filters=None, exploded=True, **metrics):
+        _check_columns(list(by) + [col for col, _ in metrics.values()])
+        dff = self._filtered(filters, exploded)
+        if not exploded and self.customer_view is not None:
+            # customers are already distinct, so counting rows is enough
+            metrics = {
+                name: (col, "size") if (col, func) == ("id", "nunique") else (col, func)
+                for name, (col, func) in metrics.items()
+            }
+        return dff.groupby(list(by), observed=True).agg(**metrics).reset_index()
+
+    def rows(self, columns, filters=None, exploded=True):
+        _check_columns(columns)
+        return self._filtered(filters, exploded)[list(columns)].reset_index(drop=True)
+
+
+class SqlQuery:
+    """
+    Same interface as MemoryQuery, but the filters and GROUP BY run in the database
+    and only the aggregate comes back. Works on Postgres and on a SQLite stand-in.
+    Purchase categories come from the customer_purchase_category table.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def _exploded_cte(self):
+        return (
+            "WITH exploded AS ("
+            f" SELECT customer_id AS id, category AS purchase_categories FROM {CATEGORY_TABLE})"
+        )
+
+    def _source(self, filters, exploded):
+        """CTE prefix, FROM clause, WHERE clause and bind params for the filtered rows."""
+        columns = (
+            "t.id, t.age, t.gender, t.age_category, t.customer_reviews_importance, t.review_reliability,"
+            " TRIM(t.purchase_frequency) AS purchase_frequency, TRIM(t.browsing_frequency) AS browsing_frequency"
+        )
+        filters = {col: values for col, values in (filters or {}).items() if values}
+        needs_categories = exploded or "purchase_categories" in filters
+        cte = self._exploded_cte() if needs_categories else ""
+
+        if exploded:
+            source = f"(SELECT {columns}, c.purchase_categories FROM {TABLE_NAME} t JOIN exploded c ON c.id = t.id) src"
+        else:
+            source = f"(SELECT {columns} FROM {TABLE_NAME} t) src"
+
+        clauses, params = [], {}
+        for col, values in filters.items():
+            key = f"f_{col}"
+            if col == "purchase_categories" and not exploded:
+                # semi-join keeps one row per customer
+                clauses.append(f"src.id IN (SELECT id FROM exploded WHERE purchase_categories IN :{key})")
+            else:
+                clauses.append(f"src.{col} IN :{key}")
+            params[key] = list(values)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return cte, source, where, params
+
+    def _read(self, sql, params):
+        stmt = text(sql)
+        for key in params:
+            stmt = stmt.bindparams(bindparam(key, expanding=True))
+        with self.engine.connect() as conn:
+            result = pd.read_sql(stmt, conn, params=params)
+        # same dtypes and category order as the in-memory frames
+        return schema.encode(result)
+
+    def aggregate(self, by, filters=None, exploded=True, **metrics):
+        _check_columns(list(by) + [col for col, _ in metrics.values()] + list(filters or {}))
+        cte, source, where, params = self._source(filters, exploded)
+        selects = [f"src.{col} AS {col}" for col in by]
+        for name, (col, func) in metrics.items():
+            selects.append(f"{AGG_SQL[func].format(col='src.' + col)} AS \"{name}\"")
+        group_by = f"GROUP BY {', '.join('src.' + col for col in by)}" if by else ""
+        result = self._read(f"{cte} SELECT {', '.join(selects)} FROM {source} {where} {group_by}", params)
+        return result.sort_values(list(by)).reset_index(drop=True) if by else result
+
+    def rows(self, columns, filters=None, exploded=True):
+        _check_columns(list(columns) + list(filters or {}))
+        cte, source, where, params = self._source(filters, exploded)
+        selects = ", ".join(f"src.{col} AS {col}" for col in columns)
+        return self._read(f"{cte} SELECT {selects} FROM {source} {where}", params)
+
+
+def get_query_engine(view_name, mode=None, customer_view=None):
+    mode = (mode or QUERY_MODE).lower()
+    if mode == "sql":
+        return SqlQuery(engine)
+    if mode == "memory":
+        return MemoryQuery(view_name, customer_view)
+    if mode == "cube":
+        # imported here because the cube builds on MemoryQuery
+        from data.cube import CubeQuery
+        return CubeQuery(view_name, customer_view)
+    raise ValueError(f"Unknown DASHBOARD_QUERY_MODE {mode!r}, expected 'cube', 'memory' or 'sql'")
@@ -0,0 +1,121 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Ordered answer scales used for sorting and axis order across the app
+category_order = ["Child", "Teenager", "Young Adult", "Adult", "Middle-aged Adult", "Older Adult"]
+# Upper age bound (exclusive) of each age category; the last one is open-ended
+age_category_bounds = [13, 20, 36, 51, 66]
+purchase_frequency_order = [
+    "Less than once a month",
+    "Once a month",
+    "Few times a month",
+    "Once a week",
+    "Multiple times a week",
+]
+browsing_frequency_order = ["Rarely", "Few times a month", "Few times a week", "Multiple times a day"]
+
+# column -> dtype the survey table is held in. A list means ordered categories,
+# "category" means unordered categories taken from the data.
+SCHEMA = {
+    "age": "UInt8",
+    "age_category": category_order,
+    "gender": "category",
+    "purchase_frequency": purchase_frequency_order,
+    "purchase_categories": "category",
+    "personalized_recommendation_frequency": "category",
+    "browsing_frequency": browsing_frequency_order,
+    "product_search_method": "category",
+    "search_result_exploration": "category",
+    "customer_reviews_importance": "Int8",
+    "add_to_cart_browsing": "category",
+    "cart_completion_frequency": "category",
+    "cart_abandonment_factors": "category",
+    "saveforlater_frequency": "category",
+    "review_left": "category",
+    "review_reliability": "category",
+    "review_helpfulness": "category",
+    "recommendation_helpfulness": "category",
+    "rating_accuracy": "Int8",
+    "shopping_satisfaction": "Int8",
+    "service_appreciation": "category",
+    "improvement_areas": "category",
+}
+
+# customer_purchase_category
+CATEGORY_SCHEMA = {
+    "category": "category",
+}
+
+
+def encode(df, schema=SCHEMA):
+    """Convert survey columns to the compact dtypes in the schema."""
+    for col, dtype in schema.items():
+        if col not in df:
+            continue
+        if isinstance(dtype, list) or dtype == "category":
+            values = df[col]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.where(values.isna(), values.astype(str).str.strip())
+            present = list(values.dropna().unique())
+            if isinstance(dtype, list):
+                # never drop answers that are missing from the known scale, put them last
+                categories = dtype + sorted(set(present) - set(dtype))
+                df[col] = pd.Categorical(values, categories=categories, ordered=True)
+            else:
+                df[col] = pd.Categorical(values, categories=sorted(present))
+        else:
+            # anything the compact integer dtype can't hold exactly (unparseable, out of range,
+            # fractional) becomes NA, so one bad row can't stop the whole table from loading
+            values = pd.to_numeric(df[col], errors="coerce").astype("float64")
+            limits = np.iinfo(pd.api.types.pandas_dtype(dtype).numpy_dtype)
+            valid = values.between(limits.min, limits.max) & (values % 1 == 0)
+            df[col] = values.where(valid).astype(dtype)
+    return df
+
+
+def with_age_category(df):
+    """
+    Derive age_category from age instead of trusting the stored column, which
+    query_scripts.add_age_categories updates in place where neither the snapshot version nor
+    refresh() would notice. Rows without an age keep the stored category.
+    """
+    if "age" not in df:
+        return df
+    age = pd.Series(df["age"].to_numpy(dtype="float64", na_value=np.nan), index=df.index)
+    derived = pd.cut(age, bins=[-np.inf] + age_category_bounds + [np.inf], labels=category_order, right=False)
+    if "age_category" in df:
+        derived = derived.astype(object).where(age.notna(), df["age_category"].astype(object))
+    df["age_category"] = derived
+    return encode(df, {"age_category": category_order})
+
+
+def align(base, new):
+    """Give both frames the same category sets so concat keeps the categorical dtypes."""
+    for col in base.columns:
+        if col in new and all(isinstance(f[col].dtype, pd.CategoricalDtype) for f in (base, new)):
+            known = list(base[col].cat.categories)
+            extra = [c for c in new[col].cat.categories if c not in set(known)]
+            categories = known + extra if base[col].cat.ordered else sorted(known + extra)
+            base[col] = base[col].cat.set_categories(categories)
+            new[col] = new[col].cat.set_categories(categories)
+    return base, new
+
+
+def memory_report(frames):
+    """Bytes per column as stored now vs. as plain Python objects, for each named frame."""
+    report = {"pid": os.getpid(), "frames": {}}
+    for name, frame in frames.items():
+        columns = {}
+        for col in frame.columns:
+            after = int(frame[col].memory_usage(deep=True, index=False))
+            before = int(frame[col].astype(object).memory_usage(deep=True, index=False))
+            columns[col] = {"dtype": str(frame[col].dtype), "before": before, "after": after}
+        report["frames"][name] = {
+            "rows": len(frame),
+            "before": sum(c["before"] for c in columns.values()),
+            "after": sum(c["after"] for c in columns.values()),
+            "columns": columns,
+        }
+    return report
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+
+import pyarrow as pa
+
+# On-disk Arrow snapshot of the table so cold starts don't have to pull it from Postgres
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cache"))
+
+
+def _paths(name):
+    base = os.path.join(SNAPSHOT_DIR, name)
+    return base + ".arrow", base + ".json"
+
+
+def read_version(name):
+    """Data version the snapshot was written at, or None if there is no snapshot."""
+    data_path, meta_path = _paths(name)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path) as f:
+            return json.load(f).get("version")
+    except (OSError, ValueError):
+        return None
+
+
+def read_snapshot(name):
+    data_path, _ = _paths(name)
+    # memory-map the file so only the pages pandas touches are read
+    with pa.memory_map(data_path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def write_snapshot(name, df, version):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    data_path, meta_path = _paths(name)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # write to temp files of this writer's own first, so a crash or another worker writing the
+    # same snapshot never leaves a half-written one; the data goes in before its version does
+    data_fd, data_tmp = tempfile.mkstemp(dir=SNAPSHOT_DIR, prefix=name, suffix=".arrow.tmp")
+    meta_fd, meta_tmp = tempfile.mkstemp(dir=SNAPSHOT_DIR, prefix=name, suffix=".json.tmp")
+    try:
+        with open(data_fd, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        with open(meta_fd, "w") as f:
+            json.dump({"version": version, "rows": len(df)}, f)
+        os.replace(data_tmp, data_path)
+        os.replace(meta_tmp, meta_path)
+    finally:
+        for tmp in (data_tmp, meta_tmp):
+            if os.path.exists(tmp):
+                os.remove(tmp)
@@ -0,0 +1,58 @@
+import pandas as pd
+
+from data.db import get_purchase_categories, register_view
+from data.schema import age_category_bounds, category_order
+
+
+def categorize_age(age):
+    for bound, category in zip(age_category_bounds, category_order):
+        if age < bound:
+            return category
+    return category_order[-1]
+
+
+def age_category_sql(column="age"):
+    """The same categories as a SQL CASE expression, so the database can derive them."""
+    whens = " ".join(
+        f"WHEN {column} < {bound} THEN '{category}'"
+        for bound, category in zip(age_category_bounds, category_order)
+    )
+    return f"CASE {whens} ELSE '{category_order[-1]}' END"
+
+bins = [0, 10, 20, 30, 40, 50, 60, 70]
+bin_labels = ['0-10', '10-20', '20-30', '30-40', '40-50', '50-60', '60-70']
+
+
+def prepare_dashboard_rows(df):
+    # One row per (customer, purchase category). Also applied to rows appended by data.db.refresh
+    categories = get_purchase_categories()
+    categories = categories[categories["customer_id"].isin(df["id"])].rename(
+        columns={"customer_id": "id", "category": "purchase_categories"}
+    )
+    # keep the base row position as the index so view rows point back at base rows
+    df = (
+        df.drop(columns="purchase_categories")
+          .reset_index()
+          .merge(categories, on="id", how="left")
+          .set_index("index")
+          .rename_axis(None)
+    )
+    # integer offset of the customer's row in the customers view
+    df["customer_row"] = df.index.to_numpy(dtype="int32")
+    df['age_bin'] = pd.cut(df['age'], bins=bins, labels=bin_labels, right=False)
+    return df
+
+
+def prepare_customer_rows(df):
+    # One row per customer, at the same position as in the base table
+    df = df.drop(columns="purchase_categories")
+    df['age_bin'] = pd.cut(df['age'], bins=bins, labels=bin_labels, right=False)
+    return df
+
+
+def dashboard_view():
+    return register_view("dashboard", prepare_dashboard_rows)
+
+
+def customer_view():
+    return register_view("dashboard_customers", prepare_customer_rows)
@@ -26,9 +26,19 @@ class FigureCard(dbc.Card):
                     className="d-flex flex-column justify-content-center p-3",
                 ),
 
+                # Progress of a background callback drawing this figure (hidden otherwise)
+                dbc.Progress(
+                    id={"type": "fig-progress", "index": id},
+                    value=0,
+                    striped=True,
+                    animated=True,
+                    style={"display": "none"},
+                ),
+
                 # Graph area (unchanged)
                 dbc.Spinner(
-                    dcc.Graph(
+                    id={"type": "fig-spinner", "index": id},
+                    children=dcc.Graph(
                         id={"type": "graph", "index": id},
                         figure=figure,
                         style={"height": "30vh", "padding-bottom": "1rem"},
@@ -60,9 +70,18 @@ class BigFigureCard(dbc.Card):
                     className="d-flex justify-content-between align-items-center p-3",
                 ),
 
+                dbc.Progress(
+                    id={"type": "fig-progress", "index": id},
+                    value=0,
+                    striped=True,
+                    animated=True,
+                    style={"display": "none"},
+                ),
+
                 # Graph area
                 dbc.Spinner(
-                    dcc.Graph(
+                    id={"type": "fig-spinner", "index": id},
+                    children=dcc.Graph(
                         id={"type": "graph", "index": id},
                         figure=figure,
                         style={"height": "70vh", "padding-bottom": "1 rem"},
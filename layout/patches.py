@@ -0,0 +1,88 @@
+import functools
+import hashlib
+import json
+import os
+
+from dash import Patch
+
+from data.memo import serialize
+
+# Set DASHBOARD_PATCH_FIGURES=0 to always send complete figures
+PATCH_FIGURES = os.getenv("DASHBOARD_PATCH_FIGURES", "1") != "0"
+
+# Trace attributes holding the plotted data; everything else in a figure is its structure
+DATA_KEYS = ("x", "y", "z", "values", "labels", "text", "customdata",
+             "q1", "median", "q3", "lowerfence", "upperfence")
+MARKER_KEYS = ("size", "sizeref", "colors")
+
+
+def _is_figure(value):
+    return isinstance(value, dict) and "data" in value and "layout" in value
+
+
+def split(figure):
+    """
+    A figure (as its JSON dict) split into a hash of its structure and, per trace, the data
+    arrays keyed by their path. Which data keys a trace has counts as structure.
+    """
+    traces, arrays = [], []
+    for trace in figure["data"]:
+        trace, data = dict(trace), {}
+        for key in DATA_KEYS:
+            if key in trace:
+                data[(key,)] = trace.pop(key)
+        if isinstance(trace.get("marker"), dict):
+            trace["marker"] = dict(trace["marker"])
+            for key in MARKER_KEYS:
+                if key in trace["marker"]:
+                    data[("marker", key)] = trace["marker"].pop(key)
+        traces.append([trace, sorted(data)])
+        arrays.append(data)
+    structure = dict(figure, data=traces)
+    digest = hashlib.blake2b(json.dumps(structure, sort_keys=True, default=str).encode(), digest_size=16)
+    return digest.hexdigest(), arrays
+
+
+def patch(arrays):
+    """A Patch replacing only the given data arrays of each trace."""
+    update = Patch()
+    for i, data in enumerate(arrays):
+        for path, value in data.items():
+            target = update["data"][i]
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = value
+    return update
+
+
+def patch_figures(fn):
+    """
+    Send only the data arrays of a figure whose structure (layout, template, trace styling,
+    hover templates) is the same as the one the browser already shows, as a dash Patch,
+    and the whole figure otherwise.
+
+    The callback takes one extra last argument, State of a dcc.Store holding the structure
+    hashes of what it sent last time, and must declare one extra last Output to that store.
+    Put it above @memoize so the memo keeps complete figures.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args):
+        *args, previous = args
+        result = fn(*args)
+        values, _ = serialize(result)
+        values = list(values) if isinstance(values, tuple) else [values]
+        previous = previous or []
+
+        out, signatures = [], []
+        for i, value in enumerate(values):
+            if not _is_figure(value):
+                out.append(value)
+                signatures.append(None)
+                continue
+            signature, arrays = split(value)
+            unchanged = PATCH_FIGURES and i < len(previous) and previous[i] == signature
+            out.append(patch(arrays) if unchanged else value)
+            signatures.append(signature)
+        return (*out, signatures)
+
+    return wrapper
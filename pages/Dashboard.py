@@ -1,45 +1,31 @@
-from dash import html, dcc, Input, Output, callback
+from dash import html, dcc, Input, Output, State, callback, clientside_callback, ClientsideFunction
 import dash_bootstrap_components as dbc
-import plotly.express as px
 import pandas as pd
 import numpy as np
-import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
 from layout.components.FigureCard import FigureCard, BigFigureCard
+from layout import figures
+from layout.patches import patch_figures
 from dash.exceptions import PreventUpdate
 from dash import Input, Output, callback, dcc
 from dash.exceptions import PreventUpdate
 from urllib.parse import parse_qs
-
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Load data once globally
-with SessionLocal() as session:
-    df = pd.read_sql("SELECT * FROM amz_customer_behavior", con=session.bind)
+from data.background import heavy_callback, progress
+from data.db import get_view_version
+from data.memo import memoize
+from data.schema import browsing_frequency_order, purchase_frequency_order
+from data.views import customer_view, dashboard_view
+from data.query import get_query_engine
 
 import dash
 dash.register_page(__name__, path='/Dashboard', title="Dashboard")
 
-df['purchase_categories'] = df['purchase_categories'].astype(str).str.split(';')
-df = df.explode('purchase_categories')
-df['purchase_categories'] = df['purchase_categories'].str.strip()
-df['purchase_frequency'] = df['purchase_frequency'].astype(str).str.strip()
-df['browsing_frequency'] = df['browsing_frequency'].astype(str).str.strip()
-
-category_order = ["Child", "Teenager", "Young Adult", "Adult", "Middle-aged Adult", "Older Adult"]
-df['age_category'] = pd.Categorical(df['age_category'], categories=category_order, ordered=True)
+# Shared frames, loaded once per process and kept current by data.db.refresh:
+# one row per (customer, purchase category) and one row per customer
+df = dashboard_view()
+customer_view()
 
-bins = [0, 10, 20, 30, 40, 50, 60, 70]
-bin_labels = ['0-10', '10-20', '20-30', '30-40', '40-50', '50-60', '60-70']
-df['age_bin'] = pd.cut(df['age'], bins=bins, labels=bin_labels, right=False)
-
-category_order = ["Child", "Teenager", "Young Adult", "Adult", "Middle-aged Adult", "Older Adult"]
-df["age_category"] = pd.Categorical(df["age_category"], categories=category_order, ordered=True)
+# Filters + group-bys run on the aggregate cube, in pandas or in SQL depending on DASHBOARD_QUERY_MODE
+query = get_query_engine("dashboard", customer_view="dashboard_customers")
 
 gender_color = {
     "Female" : "#E976AA",
@@ -48,11 +34,47 @@ gender_color = {
     "Prefer not to say": "#4F4F4F" 
 }
 
-product_category_options = [{"label": c, "value": c} for c in sorted(df["purchase_categories"].unique())]
+def jitter(keys, width):
+    """
+    Offsets in [-width, width) that depend only on each row's key, so the same data always
+    draws the same figure (and the figure can be cached). Returns independent x and y offsets.
+    """
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    low = (hashes & np.uint64(0xFFFFFFFF)) / 2**32
+    high = (hashes >> np.uint64(32)) / 2**32
+    return (low * 2 - 1) * width, (high * 2 - 1) * width
+
+
+def stratified_sample(frame, strata, size, key):
+    """
+    About `size` rows of frame with every stratum kept in proportion (and at least one row from
+    each). Rows are picked by the hash of `key`, so the same data always gives the same sample.
+    """
+    if len(frame) <= size:
+        return frame
+    order = frame.assign(_hash=pd.util.hash_pandas_object(frame[key], index=False).to_numpy())
+    grouped = order.groupby(strata, observed=True, dropna=False)["_hash"]
+    quota = np.maximum(np.round(grouped.transform("size") * size / len(frame)), 1)
+    return frame[grouped.rank(method="first") <= quota]
+
+
+# Importance vs Reliability swarm: "auto" bins into a density chart past SWARM_DENSITY_THRESHOLD
+# responses, raw points are sampled down to about SWARM_SAMPLE_SIZE
+SWARM_DENSITY_THRESHOLD = 20000
+SWARM_SAMPLE_SIZE = 5000
+
+product_category_options = [{"label": c, "value": c} for c in sorted(df["purchase_categories"].dropna().unique())]
 
 layout = dbc.Container(fluid=True, style={"min-height": "93vh", "backgroundColor": "#faf9f5"}, children=[
     dcc.Location(id="url", refresh=False),
     dcc.Store(id="initial-tab-store", storage_type="memory"),
+    # overview aggregates and figures, restyled in the browser by the display/view toggles
+    dcc.Store(id="overview-store", storage_type="memory"),
+    # structure of the figures each tab callback last sent, so filter changes can patch just the data
+    *[
+        dcc.Store(id={"type": "figure-structure", "index": name}, storage_type="memory")
+        for name in ("demographics", "correlation", "bubble", "reviews")
+    ],
 
     # ——— Tabs ———
     dbc.Tabs(id="dashboard-tabs", className="mb-1 text-small", children=[
@@ -422,6 +444,19 @@ layout = dbc.Container(fluid=True, style={"min-height": "93vh", "backgroundColor
                         multi=True,
                     ),
                 ], width=4),
+                dbc.Col([
+                    html.Label("Swarm Mode"),
+                    dbc.RadioItems(
+                        id="swarm-mode-rev",
+                        options=[
+                            {"label": "Auto",    "value": "auto"},
+                            {"label": "Density", "value": "density"},
+                            {"label": "Points",  "value": "points"},
+                        ],
+                        value="auto",
+                        inline=True,
+                    ),
+                ], width=4),
             ], className="my-3", style={"font-size": "smaller"}),
 
             dbc.Row([
@@ -461,555 +496,507 @@ layout = dbc.Container(fluid=True, style={"min-height": "93vh", "backgroundColor
     Output({"type": "graph", "index": "age-box"},           "figure"),
     Output({"type": "graph", "index": "freq-gender-bar"},   "figure"),
     Output({"type": "graph", "index": "browse-gender-bar"}, "figure"),
+    Output({"type": "figure-structure", "index": "demographics"}, "data"),
     Input("dashboard-tabs",                "active_tab"),
     Input("gender-filter-demographics",    "value"),
     Input("age-cat-filter-demographics",   "value"),
     Input("demographics-mode",             "value"),
+    State({"type": "figure-structure", "index": "demographics"}, "data"),
 )
+@patch_figures
+@memoize
 def update_demographics_tab(active_tab, genders, age_cats, mode):
     if active_tab != "tab-demographics":
         raise PreventUpdate
 
     # 1) filter
-    dff = df.copy()
-    if genders:
-        dff = dff[dff["gender"].isin(genders)]
-    if age_cats:
-        dff = dff[dff["age_category"].isin(age_cats)]
+    filters = {"gender": genders, "age_category": age_cats}
 
     # 2) Age-Category chart
     if mode == "normal":
-        age_counts = (
-            dff.groupby("age_category")["id"]
-               .nunique()
-               .reset_index(name="count")
+        age_counts = query.aggregate(
+            ["age_category"], filters, exploded=False, count=("id", "nunique")
         )
-        fig_age_cat = px.bar(
-            age_counts,
-            x="age_category",
-            y="count",
+        fig_age_cat = figures.bar(
+            age_counts["age_category"],
+            age_counts["count"],
+            hovertemplate="<b>Age Group</b>: %{x}<br><b>Customers</b>: %{y:,}<extra></extra>",
             template="plotly_white",
             height=300,
-        )
-        fig_age_cat.update_layout(
             xaxis_title="Age Category",
             yaxis_title="Unique Customers",
             margin=dict(l=40, r=20, t=20, b=60),
         )
-        fig_age_cat.update_traces(
-            hovertemplate="<b>Age Group</b>: %{x}<br><b>Customers</b>: %{y:,}<extra></extra>"
-        )
     else:  # distribution
-        age_gender = (
-            dff.groupby(["age_category", "gender"])["id"]
-               .nunique()
-               .reset_index(name="count")
+        age_gender = query.aggregate(
+            ["age_category", "gender"], filters, exploded=False, count=("id", "nunique")
         )
-        fig_age_cat = px.bar(
+        fig_age_cat = figures.grouped_bars(
             age_gender,
             x="age_category",
             y="count",
-            color="gender",
+            group="gender",
             barmode="stack",
+            color_map=gender_color,
+            hovertemplate=(
+                "<b>Age Group</b>: %{x}<br>"
+                "<b>Gender</b>: %{legendgroup}<br>"
+                "<b>Customers</b>: %{y:,}<extra></extra>"
+            ),
             template="plotly_white",
             height=300,
-            color_discrete_map=gender_color,
-        )
-        fig_age_cat.update_layout(
             xaxis_title="Age Category",
             yaxis_title="Unique Customers",
             legend_title="Gender",
             margin=dict(l=40, r=20, t=20, b=60),
         )
-        fig_age_cat.update_traces(
-            hovertemplate=(
-                "<b>Age Group</b>: %{x}<br>"
-                "<b>Gender</b>: %{legendgroup}<br>"
-                "<b>Customers</b>: %{y:,}<extra></extra>"
-            )
-        )
 
     # 3) Age by Gender (always the same)
-    df_age = dff.drop_duplicates(subset="id")[["gender", "age"]]
-    fig_age_box = px.box(
-        df_age,
-        x="gender",
-        y="age",
+    df_age = query.rows(["gender", "age"], filters, exploded=False)
+    fig_age_box = figures.box(
+        df_age["gender"],
+        df_age["age"],
+        hovertemplate="<b>Gender</b>: %{x}<br><b>Age</b>: %{y}<extra></extra>",
         template="plotly_white",
         height=300,
-    )
-    fig_age_box.update_layout(
         xaxis_title="Gender",
         yaxis_title="Age",
         margin=dict(l=40, r=20, t=20, b=60),
     )
-    fig_age_box.update_traces(
-        hovertemplate="<b>Gender</b>: %{x}<br><b>Age</b>: %{y}<extra></extra>"
-    )
 
     # 4) Purchase Frequency
     if mode == "normal":
-        freq_total = (
-            dff.groupby("purchase_frequency")["id"]
-               .nunique()
-               .reset_index(name="count")
+        freq_total = query.aggregate(
+            ["purchase_frequency"], filters, exploded=False, count=("id", "nunique")
         )
-        fig_freq = px.bar(
-            freq_total,
-            x="purchase_frequency",
-            y="count",
+        fig_freq = figures.bar(
+            freq_total["purchase_frequency"],
+            freq_total["count"],
+            hovertemplate="<b>Purchase Frequency</b>: %{x}<br><b>Customers</b>: %{y:,}<extra></extra>",
             template="plotly_white",
             height=300,
-            category_orders={"purchase_frequency": [
-                "Less than once a month",
-                "Once a month",
-                "Few times a month",
-                "Once a week",
-                "Multiple times a week",
-            ]},
-        )
-        fig_freq.update_layout(
             xaxis_title="Purchase Frequency",
             yaxis_title="Unique Customers",
             xaxis_tickangle=-45,
+            xaxis_categoryorder="array",
+            xaxis_categoryarray=purchase_frequency_order,
             margin=dict(l=40, r=20, t=20, b=60),
             showlegend=False,
         )
-        fig_freq.update_traces(
-            hovertemplate="<b>Purchase Frequency</b>: %{x}<br><b>Customers</b>: %{y:,}<extra></extra>"
-        )
     else:
-        freq_gender = (
-            dff.groupby(["gender", "purchase_frequency"])["id"]
-               .nunique()
-               .reset_index(name="count")
+        freq_gender = query.aggregate(
+            ["gender", "purchase_frequency"], filters, exploded=False, count=("id", "nunique")
         )
-        fig_freq = px.bar(
+        fig_freq = figures.grouped_bars(
             freq_gender,
             x="purchase_frequency",
             y="count",
-            color="gender",
-            barmode="group",
+            group="gender",
+            color_map=gender_color,
+            customdata=["gender"],
+            hovertemplate=(
+                "<b>Purchase Frequency</b>: %{x}<br>"
+                "<b>Customers</b>: %{y:,}<br>"
+                "<b>Gender</b>: %{customdata[0]}<extra></extra>"
+            ),
             template="plotly_white",
             height=300,
-            color_discrete_map=gender_color,
-            category_orders={"purchase_frequency": [
-                "Less than once a month",
-                "Once a month",
-                "Few times a month",
-                "Once a week",
-                "Multiple times a week",
-            ]},
-        )
-        fig_freq.update_layout(
             xaxis_title="Purchase Frequency",
             yaxis_title="Unique Customers",
             xaxis_tickangle=-45,
+            xaxis_categoryorder="array",
+            xaxis_categoryarray=purchase_frequency_order,
             legend_title="Gender",
             margin=dict(l=40, r=20, t=20, b=60),
         )
-        fig_freq.update_traces(
-            customdata=freq_gender[["gender"]].values,
-            hovertemplate=(
-                "<b>Purchase Frequency</b>: %{x}<br>"
-                "<b>Customers</b>: %{y:,}<br>"
-                "<b>Gender</b>: %{customdata[0]}<extra></extra>"
-            )
-        )
 
     # 5) Browsing Frequency
     if mode == "normal":
-        browse_total = (
-            dff.groupby("browsing_frequency")["id"]
-               .nunique()
-               .reset_index(name="count")
+        browse_total = query.aggregate(
+            ["browsing_frequency"], filters, exploded=False, count=("id", "nunique")
         )
-        fig_browse = px.bar(
-            browse_total,
-            x="browsing_frequency",
-            y="count",
+        fig_browse = figures.bar(
+            browse_total["browsing_frequency"],
+            browse_total["count"],
+            hovertemplate="<b>Browsing Frequency</b>: %{x}<br><b>Customers</b>: %{y:,}<extra></extra>",
             template="plotly_white",
             height=300,
-            category_orders={"browsing_frequency": [
-                "Less than once a month",
-                "Once a month",
-                "Few times a month",
-                "Once a week",
-                "Multiple times a week",
-            ]},
-        )
-        fig_browse.update_layout(
             xaxis_title="Browsing Frequency",
             yaxis_title="Unique Customers",
             xaxis_tickangle=-45,
+            xaxis_categoryorder="array",
+            xaxis_categoryarray=browsing_frequency_order,
             margin=dict(l=40, r=20, t=20, b=60),
             showlegend=False,
         )
-        fig_browse.update_traces(
-            hovertemplate="<b>Browsing Frequency</b>: %{x}<br><b>Customers</b>: %{y:,}<extra></extra>"
-        )
     else:
-        browse_gender = (
-            dff.groupby(["gender", "browsing_frequency"])["id"]
-               .nunique()
-               .reset_index(name="count")
+        browse_gender = query.aggregate(
+            ["gender", "browsing_frequency"], filters, exploded=False, count=("id", "nunique")
         )
-        fig_browse = px.bar(
+        fig_browse = figures.grouped_bars(
             browse_gender,
             x="browsing_frequency",
             y="count",
-            color="gender",
-            barmode="group",
+            group="gender",
+            color_map=gender_color,
+            customdata=["gender"],
+            hovertemplate=(
+                "<b>Browsing Frequency</b>: %{x}<br>"
+                "<b>Customers</b>: %{y:,}<br>"
+                "<b>Gender</b>: %{customdata[0]}<extra></extra>"
+            ),
             template="plotly_white",
             height=300,
-            color_discrete_map=gender_color,
-            category_orders={"browsing_frequency": [
-                "Less than once a month",
-                "Once a month",
-                "Few times a month",
-                "Once a week",
-                "Multiple times a week",
-            ]},
-        )
-        fig_browse.update_layout(
             xaxis_title="Browsing Frequency",
             yaxis_title="Unique Customers",
             xaxis_tickangle=-45,
+            xaxis_categoryorder="array",
+            xaxis_categoryarray=browsing_frequency_order,
             legend_title="Gender",
             margin=dict(l=40, r=20, t=20, b=60),
         )
-        fig_browse.update_traces(
-            customdata=browse_gender[["gender"]].values,
-            hovertemplate=(
-                "<b>Browsing Frequency</b>: %{x}<br>"
-                "<b>Customers</b>: %{y:,}<br>"
-                "<b>Gender</b>: %{customdata[0]}<extra></extra>"
-            )
-        )
 
     return fig_age_cat, fig_age_box, fig_freq, fig_browse
 
 @callback(
     Output({"type": "graph", "index": "heatmap-behavior"}, "figure"),
+    Output({"type": "figure-structure", "index": "correlation"}, "data"),
     Input("dashboard-tabs",             "active_tab"),
     Input("gender-filter-corr",         "value"),
     Input("age-cat-filter-corr",        "value"),
     Input("product-cat-filter-corr",    "value"),  
+    State({"type": "figure-structure", "index": "correlation"}, "data"),
 )
+@patch_figures
+@memoize
 def update_correlation_heatmap(active_tab, genders, age_cats, product_values):
     if active_tab != "tab-corr":
         raise PreventUpdate
 
-    dff = df.copy()
-    if genders:
-        dff = dff[dff["gender"].isin(genders)]
-    if age_cats:
-        dff = dff[dff["age_category"].isin(age_cats)]
-    if product_values:
-        dff = dff[dff["purchase_categories"].isin(product_values)]
-
-    heat_data = pd.crosstab(
-        index=dff["browsing_frequency"],
-        columns=dff["purchase_frequency"]
+    filters = {"gender": genders, "age_category": age_cats, "purchase_categories": product_values}
+    heat_counts = query.aggregate(
+        ["browsing_frequency", "purchase_frequency"], filters, count=("id", "size")
+    )
+    heat_data = (
+        heat_counts.pivot(index="browsing_frequency", columns="purchase_frequency", values="count")
+                   .fillna(0)
+                   .astype(int)
     )
 
-    fig = px.imshow(
+    fig = figures.heatmap(
         heat_data,
-        text_auto=True,
-        aspect="auto",
+        hovertemplate=(
+          "<b>Browsing</b>: %{y}<br>"
+          "<b>Purchase</b>: %{x}<br>"
+          "<b>Users</b>: %{z:,}<extra></extra>"
+        ),
         template="plotly_white",
-        color_continuous_scale="Viridis",
         height=400,
-    )
-    fig.update_layout(
         xaxis_title="Purchase Frequency",
         yaxis_title="Browsing Frequency",
         margin=dict(l=40, r=20, t=30, b=80),
     )
-    fig.update_traces(
-        hovertemplate=(
-          "<b>Browsing</b>: %{y}<br>"
-          "<b>Purchase</b>: %{x}<br>"
-          "<b>Users</b>: %{z:,}<extra></extra>"
-        )
-    )
     return fig
 
+# Per display mode: x values plotted, axis label and tick format, pie text and hover
+DISPLAY_MODES = {
+    "percent": {
+        "metric": "Pct of Purchases",
+        "label": "% of Total Purchases",
+        "tickformat": ".1f%",
+        "textinfo": "percent+label",
+        "hovertemplate": "<b>%{label}</b><br>Share: %{percent:.1%}<extra></extra>",
+    },
+    "count": {
+        "metric": "RawCount",
+        "label": "Raw Count",
+        "tickformat": None,
+        "textinfo": "label+value",
+        "hovertemplate": "<b>%{label}</b><br>Count: %{value:,}<extra></extra>",
+    },
+}
+
+OVERVIEW_TITLES = {
+    "overview": "Purchase Category Distribution Summary",
+    "compare":  "Purchase Category Facecet Breakdown by Gender",
+    "shares":   "Purchase Category Grouped By Gender",
+}
+OVERVIEW_CAPTIONS = {
+    "overview": "Shows the overall purchase category share. It is computed by the count of events in each category divided by all purchases in the survey",
+    "compare":  "Compare Genders view that shows horizontal bar charts side-by-side that show what share each category represents of that gender’s total purchases",
+    "shares":   "Shows the same percentages as “Compare Genders” view but presented as a grouped bar chart instead of facets",
+}
+
+
 @callback(
-    Output({"type": "graph",     "index": "overview-main-chart"}, "figure"),
-    Output({"type": "fig-title", "index": "overview-main-chart"}, "children"),
-    Output({"type": "fig-caption", "index": "overview-main-chart"}, "children"),
-    Output({"type": "graph", "index": "fig-summary"},     "figure"),
-    Output({"type": "graph", "index": "fig-product-pie"}, "figure"),
+    Output("overview-store", "data"),
     Input("gender-filter-overview",     "value"),
     Input("age-cat-filter-overview",    "value"),
     Input("product-cat-filter-overview","value"),
-    Input("overview-display-mode",      "value"),
-    Input("overview-chart-view",        "value"),
     Input("dashboard-tabs",             "active_tab"),
 )
-def update_consumer_overview_tab(genders, ages, products, display_mode, view, active_tab):
+@memoize
+def update_consumer_overview_tab(genders, ages, products, active_tab):
+    """
+    Aggregates and figures for every view of the overview tab, drawn in percent mode, plus the
+    values each display mode plots. Picking the view or the display mode happens in the
+    browser (overview_figures in assets/dashboard.js), so those toggles cost no server work.
+    """
     if active_tab != "tab-consumer-overview":
         raise PreventUpdate
 
     # 1) filter
-    dff = df.copy()
-    if genders:
-        dff = dff[dff["gender"].isin(genders)]
-    if ages:
-        dff = dff[dff["age_category"].isin(ages)]
-    if products:
-        dff = dff[dff["purchase_categories"].isin(products)]
+    filters = {"gender": genders, "age_category": ages, "purchase_categories": products}
 
     # 2) prepare aggregates
     # — overall per category —
-    overall = (
-        dff.groupby("purchase_categories")
-           .agg(RawCount=('purchase_categories','size'),
-                AvgAge=('age','mean'))
-           .reset_index()
+    overall = query.aggregate(
+        ["purchase_categories"], filters,
+        RawCount=('purchase_categories','size'),
+        AvgAge=('age','mean'),
     )
     overall["Pct of Purchases"] = overall["RawCount"] / overall["RawCount"].sum() * 100
     overall["AvgAge"] = overall["AvgAge"].round().astype("Int64")
 
     # — per-gender facets & grouped —
-    summary = (
-        dff.groupby(["gender","purchase_categories"])
-           .agg(RawCount=('purchase_categories','size'),
-                AvgAge=('age','mean'))
-           .reset_index()
+    summary = query.aggregate(
+        ["gender","purchase_categories"], filters,
+        RawCount=('purchase_categories','size'),
+        AvgAge=('age','mean'),
     )
     summary["Pct of Purchases"] = (
         summary["RawCount"]
-        / summary.groupby("gender")["RawCount"].transform("sum")
+        / summary.groupby("gender", observed=True)["RawCount"].transform("sum")
         * 100
     )
     summary["AvgAge"] = summary["AvgAge"].round().astype("Int64")
 
     # — gender totals for pie —
-    gender_totals = (
-            dff.drop_duplicates(subset="id")
-            .groupby("gender")
-            .agg(RawCount=('id','count'))
-            .reset_index()
-        )
+    gender_totals = query.aggregate(
+        ["gender"], filters, exploded=False, RawCount=('id','count')
+    )
 
     gender_totals["Pct of Purchases"] = (
         gender_totals["RawCount"] / gender_totals["RawCount"].sum() * 100
     )
 
     # — product-category pie —
-    prod_totals = (
-        dff.groupby("purchase_categories")
-           .agg(RawCount=('purchase_categories','size'))
-           .reset_index()
-    )
+    prod_totals = overall[["purchase_categories", "RawCount"]].copy()
     prod_totals["Pct of Purchases"] = (
         prod_totals["RawCount"] / prod_totals["RawCount"].sum() * 100
     )
 
-    metric = "Pct of Purchases" if display_mode=="percent" else "RawCount"
-    label  = "% of Total Purchases" if display_mode=="percent" else "Raw Count"
-    fmt    = ".1f%" if display_mode=="percent" else None
+    percent = DISPLAY_MODES["percent"]
+    metric, label, fmt = percent["metric"], percent["label"], percent["tickformat"]
 
-    fig_overall = px.bar(
-        overall,
-        x=metric, y="purchase_categories",
+    # 3) main chart, one figure per view
+    # Overall
+    fig_overview = figures.bar(
+        overall[metric], overall["purchase_categories"],
         orientation="h",
-        labels={"purchase_categories":"Purchase Category", metric:label},
-    )
-    fig_overall.update_layout(xaxis_tickformat=fmt)
-    fig_overall.update_traces(
         customdata=overall[["RawCount","Pct of Purchases","AvgAge"]].values,
         hovertemplate=(
             "<b>%{y}</b><br>"
             "Count: %{customdata[0]}<br>"
             "Share: %{customdata[1]:.1f}%<br>"
             "Avg Age: %{customdata[2]}<extra></extra>"
-        )
+        ),
+        xaxis_title=label, yaxis_title="Purchase Category",
+        xaxis_tickformat=fmt,
     )
 
-    # --- 2) Faceted by gender ---
-    fig_compare = px.bar(
+    # Faceted by gender
+    fig_compare = figures.grouped_bars(
         summary,
         x=metric, y="purchase_categories",
-        color="gender", facet_col="gender",
+        group="gender", facet=True, barmode="relative",
         orientation="h",
-        color_discrete_map=gender_color,
-        labels={"purchase_categories":"Purchase Category", metric:label},
-    )
-    fig_compare.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    fig_compare.update_layout(legend_title_text="Gender", xaxis_tickformat=fmt)
-    for trace in fig_compare.data:
-        g = trace.name
-        sub = summary[summary["gender"]==g]
-        trace.customdata   = sub[["RawCount","Pct of Purchases","AvgAge"]].values
-        trace.hovertemplate=(
+        color_map=gender_color,
+        customdata=["RawCount","Pct of Purchases","AvgAge"],
+        hovertemplate=lambda g: (
             f"<b>%{{y}}</b><br>"
             f"Gender: {g}<br>"
             "Count: %{customdata[0]}<br>"
             "Share: %{customdata[1]:.1f}%<br>"
             "Avg Age: %{customdata[2]}<extra></extra>"
-        )
+        ),
+        legend_title_text="Gender", xaxis_tickformat=fmt,
+        xaxis_title=label, yaxis_title="Purchase Category",
+    )
+    fig_compare.for_each_xaxis(lambda x: x.update(title_text=label))
 
-    # --- 3) Grouped by gender ---
-    fig_shares = px.bar(
+    # Grouped by gender
+    fig_shares = figures.grouped_bars(
         summary,
         x=metric, y="purchase_categories",
-        color="gender", barmode="group",
-        color_discrete_map=gender_color,
+        group="gender", barmode="group",
+        color_map=gender_color,
         orientation="h",
-        labels={"purchase_categories":"Purchase Category", metric:label},
-    )
-    fig_shares.update_layout(legend_title_text="Gender", xaxis_tickformat=fmt)
-    for trace in fig_shares.data:
-        g = trace.name
-        sub = summary[summary["gender"]==g]
-        trace.customdata    = sub[["RawCount","Pct of Purchases","AvgAge"]].values
-        trace.hovertemplate = (
+        customdata=["RawCount","Pct of Purchases","AvgAge"],
+        hovertemplate=lambda g: (
             f"<b>%{{y}}</b><br>"
             f"Gender: {g}<br>"
             "Count: %{customdata[0]}<br>"
             "Share: %{customdata[1]:.1f}%<br>"
             "Avg Age: %{customdata[2]}<extra></extra>"
-        )
-
-    # pick the one to show
-    main_map = {
-        "overview": fig_overall,
-        "compare":  fig_compare,
-        "shares":   fig_shares,
-    }
-    fig_main = main_map[view]
-    
-    title_map = {
-        "overview": "Purchase Category Distribution Summary",
-        "compare":  "Purchase Category Facecet Breakdown by Gender",
-        "shares":   "Purchase Category Grouped By Gender",
-    }
-    caption_map = {
-        "overview": "Shows the overall purchase category share. It is computed by the count of events in each category divided by all purchases in the survey",
-        "compare":  "Compare Genders view that shows horizontal bar charts side-by-side that show what share each category represents of that gender’s total purchases",
-        "shares":   "Shows the same percentages as “Compare Genders” view but presented as a grouped bar chart instead of facets",
-    }
-    title   = title_map[view]
-    caption = caption_map[view]
-
-    pie_value_col = "Pct of Purchases" if display_mode == "percent" else "RawCount"
-    text_info = "percent+label" if display_mode == "percent" else "label+value"
-    hover_fmt = (
-        "<b>%{label}</b><br>Share: %{percent:.1%}<extra></extra>"
-        if display_mode == "percent"
-        else "<b>%{label}</b><br>Count: %{value:,}<extra></extra>"
+        ),
+        legend_title_text="Gender", xaxis_tickformat=fmt,
+        xaxis_title=label, yaxis_title="Purchase Category",
     )
 
     # 4) Gender‐share pie
-    fig_gender_pie = px.pie(
-        gender_totals,
-        values=pie_value_col,
-        names="gender",
-        color="gender",
-        hole=0.4,
-        color_discrete_map=gender_color,
+    fig_gender_pie = figures.pie(
+        gender_totals["gender"],
+        gender_totals[metric],
+        hovertemplate=percent["hovertemplate"],
+        color_map=gender_color,
+        textinfo=percent["textinfo"],
+        textfont_size=16,
     )
     fig_gender_pie.update_layout(
         legend_title="Gender",
     )
-    fig_gender_pie.update_traces(
-        textinfo=text_info,
-        textfont_size=16,
-        hovertemplate=hover_fmt,
-    )
 
     # 5) Product‐category pie
-    fig_prod_pie = px.pie(
-        prod_totals,
-        values=pie_value_col,
-        names="purchase_categories",
-        hole=0.4,
+    fig_prod_pie = figures.pie(
+        prod_totals["purchase_categories"],
+        prod_totals[metric],
+        hovertemplate=percent["hovertemplate"],
+        textinfo=percent["textinfo"],
+        textfont_size=14,
         template="plotly_white",
     )
     fig_prod_pie.update_layout(
         legend_title="Product Category",
     )
-    fig_prod_pie.update_traces(
-        textinfo=text_info,
-        textfont_size=14,
-        hovertemplate=hover_fmt,
-    )
+
+    # 6) what each display mode plots: bar x per trace (traces follow gender order) and pie values
+    def per_gender(col):
+        return [summary.loc[summary["gender"] == g, col].tolist() for g in summary["gender"].unique()]
+
+    values = {}
+    for mode, spec in DISPLAY_MODES.items():
+        col = spec["metric"]
+        values[mode] = {
+            "overview": [overall[col].tolist()],
+            "compare": per_gender(col),
+            "shares": per_gender(col),
+            "gender": gender_totals[col].tolist(),
+            "product": prod_totals[col].tolist(),
+        }
+
+    return {
+        "figures": {
+            "overview": fig_overview,
+            "compare": fig_compare,
+            "shares": fig_shares,
+            "gender": fig_gender_pie,
+            "product": fig_prod_pie,
+        },
+        "values": values,
+        "modes": DISPLAY_MODES,
+        "titles": OVERVIEW_TITLES,
+        "captions": OVERVIEW_CAPTIONS,
+    }
 
 
-    return fig_main, title, caption, fig_gender_pie, fig_prod_pie
+clientside_callback(
+    ClientsideFunction(namespace="dashboard", function_name="overview_figures"),
+    Output({"type": "graph",     "index": "overview-main-chart"}, "figure"),
+    Output({"type": "fig-title", "index": "overview-main-chart"}, "children"),
+    Output({"type": "fig-caption", "index": "overview-main-chart"}, "children"),
+    Output({"type": "graph", "index": "fig-summary"},     "figure"),
+    Output({"type": "graph", "index": "fig-product-pie"}, "figure"),
+    Input("overview-store",        "data"),
+    Input("overview-display-mode", "value"),
+    Input("overview-chart-view",   "value"),
+)
 
 
-@callback(
+_bubble_options = None
+
+
+def bubble_options():
+    """Bubble chart dropdown options and age order, rebuilt only when the data version changes."""
+    global _bubble_options
+    frame, version = get_view_version("dashboard")
+    if _bubble_options is None or _bubble_options[0] != version:
+        # categories actually in use, read from the codes instead of scanning values
+        present = {
+            col: list(frame[col].cat.remove_unused_categories().cat.categories)
+            for col in ("gender", "age_category", "purchase_categories")
+        }
+        age_order = list(frame["age_category"].cat.categories)
+        _bubble_options = (
+            version,
+            [{"label": g, "value": g} for g in sorted(present["gender"])],
+            age_order,
+            [{"label": a, "value": a} for a in age_order if a in present["age_category"]],
+            [{"label": p, "value": p} for p in sorted(present["purchase_categories"])],
+        )
+    return _bubble_options[1:]
+
+
+@heavy_callback(
+    "bubble-purchase-view",
     Output({"type": "graph", "index": "bubble-purchase-view"}, "figure"),
     Output({"type": "fig-title", "index": "bubble-purchase-view"}, "children"),
     Output({"type": "fig-caption", "index": "bubble-purchase-view"}, "children"),
     Output("bubble-gender-filter", "options"),
     Output("bubble-age-filter", "options"),
     Output("bubble-product-filter", "options"),
+    Output({"type": "figure-structure", "index": "bubble"}, "data"),
     Input("bubble-gender-filter", "value"),
     Input("bubble-age-filter", "value"),
     Input("bubble-product-filter", "value"),
     Input("bubble-view-toggle", "value"),
     Input("dashboard-tabs", "active_tab"),
+    State({"type": "figure-structure", "index": "bubble"}, "data"),
 )
+@patch_figures
+@memoize
 def update_bubble_chart(genders, ages, products, view_mode, active_tab):
     if active_tab != "tab-bubble-view":
         raise PreventUpdate
 
-    df_copy = df.copy()
-    df_copy["purch_cat_list"] = df_copy["purchase_categories"].astype(str).str.split(";")
-    df_sep_cat = df_copy.explode("purch_cat_list")
-    df_sep_cat["purch_cat_list"] = df_sep_cat["purch_cat_list"].str.strip()
-
-    gender_options = [{"label": g, "value": g} for g in sorted(df_sep_cat["gender"].dropna().unique())]
-    age_order = list(df["age_category"].cat.categories)
-    age_options = [{"label": a, "value": a} for a in age_order if a in df_sep_cat["age_category"].unique()]
-    product_options = [{"label": p, "value": p} for p in sorted(df_sep_cat["purch_cat_list"].dropna().unique())]
+    gender_options, age_order, age_options, product_options = bubble_options()
 
-    if genders:
-        df_sep_cat = df_sep_cat[df_sep_cat["gender"].isin(genders)]
-    if ages:
-        df_sep_cat = df_sep_cat[df_sep_cat["age_category"].isin(ages)]
-    if products:
-        df_sep_cat = df_sep_cat[df_sep_cat["purch_cat_list"].isin(products)]
+    # one row per purchase category, counted without touching the raw rows
+    filters = {"gender": genders, "age_category": ages, "purchase_categories": products}
+    df_with_counts = query.aggregate(
+        ["age_category", "purchase_frequency", "gender", "purchase_categories"], filters, count=("id", "size")
+    ).rename(columns={"purchase_categories": "purch_cat_list"})
+    progress(1, 2)
 
-    x_axis = ["Less than once a month", "Once a month", "Few times a month", "Once a week", "Multiple times a week"]
-
-    df_with_counts = (
-        df_sep_cat.groupby(["age_category", "purchase_frequency", "gender", "purch_cat_list"], observed=True)
-        .size().reset_index(name="count")
-    )
+    x_axis = purchase_frequency_order
 
     df_with_counts["purchase_frequency"] = pd.Categorical(df_with_counts["purchase_frequency"], categories=x_axis, ordered=True)
     df_with_counts["age_category"] = pd.Categorical(df_with_counts["age_category"], categories=age_order, ordered=True)
 
-    df_with_counts["xspacing"] = df_with_counts["purchase_frequency"].cat.codes + np.random.uniform(-0.1, 0.1, len(df_with_counts))
-    df_with_counts["yspacing"] = df_with_counts["age_category"].cat.codes + np.random.uniform(-0.3, 0.3, len(df_with_counts))
-
-    df_with_counts["hover_text"] = df_with_counts.apply(
-        lambda row: f'{row["count"]} {row["gender"]}s in {row["age_category"]} group<br>'
-                    f'buy {row["purch_cat_list"]} {row["purchase_frequency"]}', axis=1
-    )
+    # each bubble keeps its place for as long as its group exists
+    x_jitter, y_jitter = jitter(df_with_counts[["age_category", "purchase_frequency", "gender", "purch_cat_list"]], 1)
+    df_with_counts["xspacing"] = df_with_counts["purchase_frequency"].cat.codes + x_jitter * 0.1
+    df_with_counts["yspacing"] = df_with_counts["age_category"].cat.codes + y_jitter * 0.3
 
+    # hover text is filled in by the browser from customdata, no per-bubble strings
     common_args = dict(
         x="xspacing",
         y="yspacing",
         size="count",
         size_max=40,
-        color="gender",
-        color_discrete_map=gender_color,
-        hover_name="hover_text",
-        hover_data={"count": False, "purch_cat_list": False, "gender": False, "xspacing": False, "yspacing": False},
+        group="gender",
+        color_map=gender_color,
+        customdata=["count", "gender", "age_category", "purch_cat_list", "purchase_frequency"],
+        hovertemplate=(
+            "<b>%{customdata[0]} %{customdata[1]}s in %{customdata[2]} group<br>"
+            "buy %{customdata[3]} %{customdata[4]}</b><extra></extra>"
+        ),
         height=600,
     )
 
     if view_mode == "facet":
-        fig = px.scatter(df_with_counts, facet_col="purch_cat_list", facet_col_spacing=0.08,
-                         facet_row_spacing=0.1, facet_col_wrap=3, **common_args)
-        fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+        fig = figures.scatter(df_with_counts, facet="purch_cat_list", facet_spacing=(0.08, 0.1),
+                              facet_wrap=3, **common_args)
         fig.for_each_xaxis(
             lambda x: x.update(
                 tickmode="array",
@@ -1037,7 +1024,7 @@ def update_bubble_chart(genders, ages, products, view_mode, active_tab):
         caption = "A faceted view of purchase categories to compare trends of purchase frequency and age group against gender with the area of the bubble related to the number of matches for those three variables."
 
     else:
-        fig = px.scatter(df_with_counts, **common_args)
+        fig = figures.scatter(df_with_counts, **common_args)
         fig.update_layout(
             xaxis=dict(tickmode="array", tickvals=list(range(len(x_axis))), ticktext=x_axis, title="Purchase Frequency"),
             yaxis=dict(tickmode="array", tickvals=list(range(len(age_order))), ticktext=age_order, title="Age Category")
@@ -1053,126 +1040,176 @@ def update_bubble_chart(genders, ages, products, view_mode, active_tab):
     return fig, title, caption, gender_options, age_options, product_options
 
 
-@callback(
+@heavy_callback(
+    "imp-vs-rel",
     Output({"type": "graph", "index": "imp-by-freq"},  "figure"),
     Output({"type": "graph", "index": "rel-by-freq"},  "figure"),
     Output({"type": "graph", "index": "imp-trend"},    "figure"),
     Output({"type": "graph", "index": "imp-vs-rel"},   "figure"),
+    Output({"type": "figure-structure", "index": "reviews"}, "data"),
     Input("dashboard-tabs",         "active_tab"),
     Input("gender-filter-rev",      "value"),
     Input("age-cat-filter-rev",     "value"),
+    Input("swarm-mode-rev",         "value"),
+    State({"type": "figure-structure", "index": "reviews"}, "data"),
 )
-def update_reviews_tab(active_tab, genders, age_cats):
+@patch_figures
+@memoize
+def update_reviews_tab(active_tab, genders, age_cats, swarm_mode):
     if active_tab != "tab-reviews":
         raise PreventUpdate
 
-    # 1) apply filters
-    dff = df.copy()
-    if genders:
-        dff = dff[dff["gender"].isin(genders)]
-    if age_cats:
-        dff = dff[dff["age_category"].isin(age_cats)]
+    # 1) apply filters; every chart on this tab counts each customer once
+    filters = {"gender": genders, "age_category": age_cats}
+    dff = query.rows(
+        ["id", "purchase_frequency", "customer_reviews_importance", "review_reliability"], filters,
+        exploded=False,
+    )
+    progress(1, 4)
 
     # 2) enforce purchase-frequency order
-    FREQ_ORDER = [
-        "Less than once a month",
-        "Once a month",
-        "Few times a month",
-        "Once a week",
-        "Multiple times a week",
-    ]
+    FREQ_ORDER = purchase_frequency_order
     dff["purchase_frequency"] = pd.Categorical(
         dff["purchase_frequency"], categories=FREQ_ORDER, ordered=True
     )
 
     # a) Review Importance by Purchase Frequency (box)
-    fig_imp_by_freq = px.box(
-        dff,
-        x="purchase_frequency",
-        y="customer_reviews_importance",
+    fig_imp_by_freq = figures.box(
+        dff["purchase_frequency"],
+        dff["customer_reviews_importance"],
+        hovertemplate="<b>Freq</b>: %{x}<br><b>Importance</b>: %{y}<extra></extra>",
         template="plotly_white",
         height=300,
-    )
-    fig_imp_by_freq.update_layout(
         xaxis_title="Purchase Frequency",
         yaxis_title="Review Importance",
         margin=dict(l=40, r=20, t=20, b=80),
     )
-    fig_imp_by_freq.update_traces(
-        hovertemplate="<b>Freq</b>: %{x}<br><b>Importance</b>: %{y}<extra></extra>"
-    )
+
+    progress(2, 4)
 
     # b) Review Reliability Distribution by Purchase Frequency (heatmap)
-    rel_levels = sorted(dff["review_reliability"].dropna().unique())
-    heat_rel = pd.crosstab(
-        index=dff["purchase_frequency"],
-        columns=dff["review_reliability"],
-    ).reindex(index=FREQ_ORDER, columns=rel_levels, fill_value=0)
+    rel_counts = query.aggregate(
+        ["purchase_frequency", "review_reliability"], filters, exploded=False, count=("id", "size")
+    )
+    rel_levels = sorted(rel_counts["review_reliability"].dropna().unique())
+    heat_rel = (
+        rel_counts.pivot(index="purchase_frequency", columns="review_reliability", values="count")
+                  .reindex(index=FREQ_ORDER, columns=rel_levels)
+                  .fillna(0)
+                  .astype(int)
+    )
 
-    fig_rel_by_freq = px.imshow(
+    fig_rel_by_freq = figures.heatmap(
         heat_rel,
-        text_auto=True,
-        aspect="auto",
+        hovertemplate="<b>Freq</b>: %{y}<br><b>Reliability</b>: %{x}<br><b>Count</b>: %{z}<extra></extra>",
         template="plotly_white",
-        color_continuous_scale="Viridis",
         height=300,
-    )
-    fig_rel_by_freq.update_layout(
         xaxis_title="Review Reliability",
         yaxis_title="Purchase Frequency",
         margin=dict(l=40, r=20, t=20, b=80),
     )
     fig_rel_by_freq.update_xaxes(categoryorder="array", categoryarray=rel_levels)
     fig_rel_by_freq.update_yaxes(categoryorder="array", categoryarray=FREQ_ORDER)
-    fig_rel_by_freq.update_traces(
-        hovertemplate="<b>Freq</b>: %{y}<br><b>Reliability</b>: %{x}<br><b>Count</b>: %{z}<extra></extra>"
-    )
 
     # c) Average Review Importance by Purchase Frequency (bar)
-    avg_imp = (
-        dff.groupby("purchase_frequency")["customer_reviews_importance"]
-           .mean()
-           .reset_index(name="avg_importance")
+    avg_imp = query.aggregate(
+        ["purchase_frequency"], filters, exploded=False,
+        avg_importance=("customer_reviews_importance", "mean"),
     )
-    fig_imp_trend = px.bar(
-        avg_imp,
-        x="purchase_frequency",
-        y="avg_importance",
+    avg_imp["purchase_frequency"] = pd.Categorical(
+        avg_imp["purchase_frequency"], categories=FREQ_ORDER, ordered=True
+    )
+    avg_imp = avg_imp.sort_values("purchase_frequency")
+    fig_imp_trend = figures.bar(
+        avg_imp["purchase_frequency"],
+        avg_imp["avg_importance"],
+        hovertemplate="<b>Freq</b>: %{x}<br><b>Avg Importance</b>: %{y:.2f}<extra></extra>",
         template="plotly_white",
         height=300,
-    )
-    fig_imp_trend.update_layout(
         xaxis_title="Purchase Frequency",
         yaxis_title="Average Importance",
         margin=dict(l=40, r=20, t=20, b=80),
     )
-    fig_imp_trend.update_traces(
-        hovertemplate="<b>Freq</b>: %{x}<br><b>Avg Importance</b>: %{y:.2f}<extra></extra>"
-    )
 
-    # d) Importance vs Reliability Ratings — jittered scatter
-    df_scatter = dff.copy()
-    # jitter x around the categorical code
-    df_scatter["xf"] = (
-        df_scatter["purchase_frequency"].cat.codes.astype(float)
-        + np.random.uniform(-0.2, 0.2, len(df_scatter))
-    )
-    # jitter y around the importance scale 1–5
-    df_scatter["yf"] = (
-        df_scatter["customer_reviews_importance"].astype(float) - 1
-        + np.random.uniform(-0.1, 0.1, len(df_scatter))
-    )
+    progress(3, 4)
+
+    # d) Importance vs Reliability Ratings
+    # one trace and colour per reliability level in a fixed order, whichever levels the filters leave
+    reliability_color = dict(zip(dff["review_reliability"].cat.categories, figures.COLORWAY))
+    if swarm_mode == "auto":
+        swarm_mode = "density" if len(dff) > SWARM_DENSITY_THRESHOLD else "points"
+
+    if swarm_mode == "density":
+        # one bubble per (frequency, importance, reliability) bin, sized by its count;
+        # reliability levels sit side by side within each frequency
+        bins = (
+            dff.groupby(["purchase_frequency", "customer_reviews_importance", "review_reliability"],
+                        observed=True)
+               .size()
+               .reset_index(name="count")
+               .sort_values("review_reliability", kind="stable")
+        )
+        levels = sorted(bins["review_reliability"].dropna().unique())
+        offset = {level: (i - (len(levels) - 1) / 2) * 0.15 for i, level in enumerate(levels)}
+        bins["xf"] = bins["purchase_frequency"].cat.codes + bins["review_reliability"].map(offset).astype(float)
+        bins["yf"] = bins["customer_reviews_importance"].astype(float) - 1
+        fig_imp_vs_rel = figures.scatter(
+            bins,
+            x="xf",
+            y="yf",
+            group="review_reliability",
+            color_map=reliability_color,
+            size="count",
+            size_max=25,
+            customdata=["purchase_frequency", "customer_reviews_importance", "count"],
+            hovertemplate=lambda r: (
+                f"review_reliability={r}<br>"
+                "purchase_frequency=%{customdata[0]}<br>"
+                "customer_reviews_importance=%{customdata[1]}<br>"
+                "count=%{customdata[2]}<extra></extra>"
+            ),
+            template="plotly_white",
+            height=300,
+        )
+    else:
+        # every stratum stays visible in proportion; above WEBGL_THRESHOLD points draw with WebGL
+        df_scatter = stratified_sample(
+            dff, ["purchase_frequency", "customer_reviews_importance", "review_reliability"],
+            SWARM_SAMPLE_SIZE, "id",
+        ).sort_values("review_reliability", kind="stable")
+        # a customer's point stays put between renders
+        x_jitter, y_jitter = jitter(df_scatter["id"], 1)
+        # jitter x around the categorical code
+        df_scatter["xf"] = (
+            df_scatter["purchase_frequency"].cat.codes.astype(float)
+            + x_jitter * 0.2
+        )
+        # jitter y around the importance scale 1–5
+        df_scatter["yf"] = (
+            df_scatter["customer_reviews_importance"].astype(float) - 1
+            + y_jitter * 0.1
+        )
 
-    fig_imp_vs_rel = px.scatter(
-        df_scatter,
-        x="xf",
-        y="yf",
-        color="review_reliability",
-        template="plotly_white",
-        height=300,
-        hover_data=["purchase_frequency", "customer_reviews_importance", "review_reliability"],
-        color_discrete_map=None,  # or your custom map
-    )
+        fig_imp_vs_rel = figures.scatter(
+            df_scatter,
+            x="xf",
+            y="yf",
+            group="review_reliability",
+            color_map=reliability_color,
+            customdata=["purchase_frequency", "customer_reviews_importance"],
+            hovertemplate=lambda r: (
+                f"review_reliability={r}<br>xf=%{{x}}<br>yf=%{{y}}<br>"
+                "purchase_frequency=%{customdata[0]}<br>"
+                "customer_reviews_importance=%{customdata[1]}<extra></extra>"
+            ),
+            marker=dict(size=6, opacity=0.6),
+            template="plotly_white",
+            height=300,
+        )
+        if len(df_scatter) < len(dff):
+            fig_imp_vs_rel.update_layout(
+                title=dict(text=f"Sample of {len(df_scatter):,} / {len(dff):,} responses", font=dict(size=11))
+            )
     # restore original tick labels
     fig_imp_vs_rel.update_xaxes(
         tickmode="array",
@@ -1186,7 +1223,6 @@ def update_reviews_tab(active_tab, genders, age_cats):
         ticktext=[1, 2, 3, 4, 5],
         title_text="Review Importance",
     )
-    fig_imp_vs_rel.update_traces(marker=dict(size=6, opacity=0.6))
 
     return fig_imp_by_freq, fig_rel_by_freq, fig_imp_trend, fig_imp_vs_rel
 
@@ -2,15 +2,8 @@
 from dash import html, register_page
 import dash_bootstrap_components as dbc
 from dash import html, dcc, Input, Output, callback
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from sqlalchemy import text
+from data.db import SessionLocal
 
 register_page(
     __name__,
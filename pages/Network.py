@@ -1,13 +1,11 @@
-from dash import html, dcc
-import dash_bootstrap_components as dbc
-import pandas as pd
+from dash import html, dcc, Input, Output, State, callback, clientside_callback, ClientsideFunction
+from dash.exceptions import PreventUpdate
+import functools
 import os
+import dash_bootstrap_components as dbc
+import numpy as np
 import plotly.graph_objects as go
-import networkx as nx
-from collections import Counter
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from data.network import building, get_network
 from layout.components.FigureCard import BigFigureCard
 import dash
 
@@ -19,209 +17,269 @@ dash.register_page(
     description="Animated, dynamic-layout buildup of co-occurrence graph with controls and legend"
 )
 
-# 2) Load full dataset
-load_dotenv()
-engine = create_engine(os.getenv("DATABASE_URL"))
-SessionLocal = sessionmaker(bind=engine)
-with SessionLocal() as session:
-    df = pd.read_sql("SELECT * FROM amz_customer_behavior", con=session.bind)
-
-# 3) Extract helper
-def extract(row):
-    attrs = []
-    if row.purchase_frequency:    attrs.append(f"Purchase: {row.purchase_frequency}")
-    if row.browsing_frequency:    attrs.append(f"Browse: {row.browsing_frequency}")
-    if row.gender:               attrs.append(f"Gender: {row.gender}")
-    # return sorted pairs
-    return [tuple(sorted((attrs[i], attrs[j])))
-            for i in range(len(attrs)) for j in range(i+1, len(attrs))]
-
-records = [extract(r) for _, r in df.iterrows()]
-
-# 4) Build frames
-cum_pairs = Counter()
-frames = []
-
-# blank frame
-frames.append(go.Frame(name="0", data=[
-    dict(x=[], y=[], hovertext=[]),
-    dict(x=[], y=[], text=[], hovertext=[], marker=dict(size=[], color=[])),
-    dict(x=[], y=[], hovertext=[], hovertemplate="%{hovertext}<extra></extra>",
-         mode="markers", marker=dict(size=10, color="rgba(0,0,0,0)"), showlegend=False)
-]))
-
-for idx, pairs in enumerate(records, start=1):
-    cum_pairs.update(pairs)
-    G_i = nx.Graph()
-    for (u, v), w in cum_pairs.items():
-        if w > 0:
-            G_i.add_edge(u, v, weight=w)
-
-    pos_i = nx.spring_layout(G_i, weight="weight", k=0.5, iterations=20)
-
-    # optional zoom bounds
-    xs = [x for x, y in pos_i.values()]; ys = [y for x, y in pos_i.values()]
-    xmin, xmax = min(xs)-1, max(xs)+1
-    ymin, ymax = min(ys)-1, max(ys)+1
-
-    # build edge coords + hovertext
-    edge_x, edge_y, edge_hover = [], [], []
-    mid_x, mid_y, mid_hover = [], [], []
-    for u, v in G_i.edges():
-        x0, y0 = pos_i[u]; x1, y1 = pos_i[v]
-        edge_x += [x0, x1, None]
-        edge_y += [y0, y1, None]
-        key = tuple(sorted((u, v)))
-        count = cum_pairs.get(key, 0)
-        txt = f"{u} ↔ {v}  |  co-occurrences: {count}"
-        edge_hover.append(txt)
-        # midpoint
-        mid_x.append((x0 + x1)/2)
-        mid_y.append((y0 + y1)/2)
-        mid_hover.append(txt)
-
-    # build node coords + hover + size/color
-    score = Counter()
-    for (u, v), w in cum_pairs.items():
-        score[u] += w; score[v] += w
-    max_s = max(score.values()) or 1
-
-    node_x, node_y, node_text, node_hover, node_sizes, node_colors = [], [], [], [], [], []
-    for node in G_i.nodes():
-        node_x.append(pos_i[node][0]); node_y.append(pos_i[node][1])
-        node_text.append(node)
-        node_hover.append(f"{node}  |  occurrences: {score[node]}")
-        node_sizes.append(10 + (score[node]/max_s)*40)
-        node_colors.append(
-            "#1f77b4" if node.startswith("Purchase") else
-            "#ff7f0e" if node.startswith("Browse") else
-            "#2ca02c"
-        )
-
-    frames.append(go.Frame(name=str(idx), data=[
-        dict(x=edge_x, y=edge_y, hovertext=edge_hover),
-        dict(x=node_x, y=node_y, text=node_text, hovertext=node_hover,
-             marker=dict(size=node_sizes, color=node_colors)),
-        dict(x=mid_x, y=mid_y, hovertext=mid_hover,
-             hovertemplate="%{hovertext}<extra></extra>",
-             mode="markers", marker=dict(size=10, color="rgba(0,0,0,0)"), showlegend=False)
-    ]))
-
-# 5) Base traces
-edge_trace = go.Scatter(
-    x=[], y=[], mode="lines",
-    line=dict(width=2, color="#888"),
-    hoverinfo="text", hovertext=[], hovertemplate="%{hovertext}<extra></extra>",
-    showlegend=False
-)
-node_trace = go.Scatter(
-    x=[], y=[], mode="markers+text",
-    text=[], textposition="top center",
-    hovertext=[], hovertemplate="%{hovertext}<extra></extra>",
-    marker=dict(size=[], color=[], line=dict(width=1, color="#333")),
-    showlegend=False
+# 2) Frames: positions, edge weights and node scores of every record come from data.network,
+# built ahead of time by `python -m query_scripts.build_network` and loaded on first use.
+# The slider steps through keyframes, every NETWORK_KEYFRAME_STRIDE-th record or, with
+# NETWORK_KEYFRAME_SCHEDULE=log, NETWORK_KEYFRAME_COUNT log-spaced ones (dense early on, when the
+# network still changes a lot); the browser interpolates INTERPOLATION_STEPS steps between them.
+KEYFRAME_SCHEDULE = os.getenv("NETWORK_KEYFRAME_SCHEDULE", "stride")
+KEYFRAME_STRIDE = int(os.getenv("NETWORK_KEYFRAME_STRIDE", "10"))
+KEYFRAME_COUNT = int(os.getenv("NETWORK_KEYFRAME_COUNT", "200"))
+INTERPOLATION_STEPS = 4
+# ms per interpolation step, so a keyframe takes INTERPOLATION_STEPS * PLAY_INTERVAL_MS
+PLAY_INTERVAL_MS = 50
+# Keyframes reach the browser on demand: FRAME_WINDOW at a time, a new window is asked for once
+# playback is within FRAME_PREFETCH keyframes of the end of the current one
+FRAME_WINDOW = 50
+FRAME_PREFETCH = 10
+# encoded windows kept on the server
+FRAME_CACHE_SIZE = 256
+# positions are sent rounded to this many decimals (the layout spans a few units)
+POSITION_DECIMALS = 4
+
+
+@functools.lru_cache(maxsize=8)
+def keyframes(total):
+    """Frame numbers (= record numbers) the slider steps through, always the first and the last."""
+    if total <= 1:
+        # only the blank frame: an empty table, or a network still being laid out
+        return [0]
+    if KEYFRAME_SCHEDULE == "log":
+        picked = np.round(np.geomspace(1, total - 1, KEYFRAME_COUNT)).astype(int)
+    else:
+        picked = np.arange(0, total, max(KEYFRAME_STRIDE, 1))
+    return np.unique(np.concatenate([[0], np.minimum(picked, total - 1), [total - 1]])).tolist()
+
+
+def frame_state(network, idx):
+    """Positions (flattened, rounded), edge weights and node scores of frame `idx`."""
+    snap = network.snapshots[idx]
+    if snap is None:
+        return np.zeros(0), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+    xy, edge_weight, node_score = snap
+    return np.round(xy.astype(np.float64).ravel(), POSITION_DECIMALS), edge_weight, node_score
+
+
+def delta(current, previous):
+    """current minus previous, where previous is padded with zeros for nodes/edges that are new."""
+    return current - np.pad(previous, (0, len(current) - len(previous)))
+
+
+@functools.lru_cache(maxsize=FRAME_CACHE_SIZE)
+def frame_window(network, start, total):
+    """
+    Keyframes start .. start + FRAME_WINDOW of a network with `total` frames, as the browser keeps
+    them in network-frames: the first one whole, every later one as the change in node positions,
+    edge weights and node scores since the keyframe before it (assets/network.js adds them up).
+    Cached per network, since a rebuilt one (see data.network.get_network) has other positions.
+    """
+    keys = keyframes(total)
+    start = max(0, min(start, len(keys) - 1))
+    stop = min(start + FRAME_WINDOW, len(keys))
+
+    encoded, previous = [], None
+    for idx in keys[start:stop]:
+        xy, edge_weight, node_score = frame_state(network, idx)
+        if previous is None:
+            encoded.append({"xy": xy.tolist(), "w": edge_weight.tolist(), "s": node_score.tolist()})
+        else:
+            encoded.append({
+                "dxy": np.round(delta(xy, previous[0]), POSITION_DECIMALS).tolist(),
+                "dw": delta(edge_weight, previous[1]).tolist(),
+                "ds": delta(node_score, previous[2]).tolist(),
+            })
+        previous = xy, edge_weight, node_score
+
+    # labels of every node and edge the window's keyframes show
+    nodes = network.nodes[:len(previous[2])]
+    edges = [[network.node_index[u], network.node_index[v]] for u, v in network.edges[:len(previous[1])]]
+    return {"start": start, "total": len(keys), "records": keys[start:stop], "last_record": keys[-1],
+            "nodes": nodes, "edges": edges, "keyframes": encoded}
+
+
+def build_figure():
+    # 5) Base traces; assets/network.js draws the keyframes into them
+    edge_trace = go.Scatter(
+        x=[], y=[], mode="lines",
+        line=dict(width=2, color="#888"),
+        hoverinfo="text", hovertext=[], hovertemplate="%{hovertext}<extra></extra>",
+        showlegend=False
+    )
+    node_trace = go.Scatter(
+        x=[], y=[], mode="markers+text",
+        text=[], textposition="top center",
+        hovertext=[], hovertemplate="%{hovertext}<extra></extra>",
+        marker=dict(size=[], color=[], line=dict(width=1, color="#333")),
+        showlegend=False
+    )
+    midpoint_trace = go.Scatter(
+        x=[], y=[], mode="markers",
+        marker=dict(size=10, color="rgba(0,0,0,0)"),
+        hovertext=[], hovertemplate="%{hovertext}<extra></extra>",
+        showlegend=False
+    )
+    bounds = get_network().bounds
+
+    # 6) Legend traces
+    legend_traces = [
+        go.Scatter(x=[None], y=[None], mode="markers",
+                   marker=dict(size=12, color="#1f77b4"), name="Purchase"),
+        go.Scatter(x=[None], y=[None], mode="markers",
+                   marker=dict(size=12, color="#ff7f0e"), name="Browse"),
+        go.Scatter(x=[None], y=[None], mode="markers",
+                   marker=dict(size=12, color="#2ca02c"), name="Gender")
+    ]
+
+    # 7) Assemble figure; the slider and Play/Pause below the card step through the frames
+    fig = go.Figure(
+        data=[edge_trace, node_trace, midpoint_trace] + legend_traces,
+    )
+    fig.update_layout(
+        margin=dict(l=20, r=20, t=50, b=20),
+        xaxis=dict(visible=False, autorange=False, range=bounds[:2]),
+        yaxis=dict(visible=False, autorange=False, range=bounds[2:]),
+        hovermode="closest",
+        legend=dict(x=0.99, y=0.99, xanchor="right", yanchor="top"),
+    )
+    return fig
+
+
+@callback(
+    Output("network-frames", "data"),
+    Input("network-frame-request", "data"),
 )
-midpoint_trace = go.Scatter(
-    x=[], y=[], mode="markers",
-    marker=dict(size=10, color="rgba(0,0,0,0)"),
-    hovertext=[], hovertemplate="%{hovertext}<extra></extra>",
-    showlegend=False
+def load_frames(request):
+    if not request:
+        raise PreventUpdate
+    # keyframes of the frame count the page was laid out with, so windows keep matching the
+    # slider after rows added since then extend the network
+    network = get_network()
+    frames = len(network.snapshots)
+    return frame_window(network, request["start"], min(request.get("frames") or frames, frames))
+
+
+# Playback runs in the browser (assets/network.js): it asks for a new window only when the
+# slider leaves the keyframes it has, or playback gets close to their end
+clientside_callback(
+    ClientsideFunction(namespace="network", function_name="request_frames"),
+    Output("network-frame-request", "data"),
+    Input("network-slider", "value"),
+    State("network-frames", "data"),
+    State("network-frame-request", "data"),
+    State("network-frame-config", "data"),
 )
 
-# 6) Legend traces
-legend_traces = [
-    go.Scatter(x=[None], y=[None], mode="markers",
-               marker=dict(size=12, color="#1f77b4"), name="Purchase"),
-    go.Scatter(x=[None], y=[None], mode="markers",
-               marker=dict(size=12, color="#ff7f0e"), name="Browse"),
-    go.Scatter(x=[None], y=[None], mode="markers",
-               marker=dict(size=12, color="#2ca02c"), name="Gender")
-]
-
-# 7) Assemble figure
-fig = go.Figure(
-    data=[edge_trace, node_trace, midpoint_trace] + legend_traces,
-    frames=frames
+clientside_callback(
+    ClientsideFunction(namespace="network", function_name="show_frame"),
+    Output({"type": "graph", "index": "network-graph"}, "figure"),
+    Output("network-record", "children"),
+    Input("network-slider", "value"),
+    Input("network-playhead", "data"),
+    Input("network-frames", "data"),
+    State({"type": "graph", "index": "network-graph"}, "figure"),
+    State("network-frame-config", "data"),
 )
-fig.update_layout(
-    margin=dict(l=20, r=20, t=50, b=80),
-    xaxis=dict(visible=False, autorange=False, range=[xmin, xmax]),
-    yaxis=dict(visible=False, autorange=False, range=[ymin, ymax]),
-    hovermode="closest",
-    legend=dict(x=0.99, y=0.99, xanchor="right", yanchor="top"),
-    sliders=[{
-        "pad": {"t": 50},
-        "currentvalue": {"prefix": "Record # "},
-        "steps": [
-            {"args": [[f.name], {"frame": {"duration": 0, "redraw": True}, "mode": "immediate"}],
-             "label": f.name, "method": "animate"}
-            for f in frames
-        ]
-    }],
-    updatemenus=[{
-        "type": "buttons", "direction": "left", "pad": {"t": 50},
-        "x": 0.5, "y": -0.2, "xanchor": "center", "yanchor": "top",
-        "buttons": [
-            {"label": "▶ Play",  "method": "animate",
-             "args": [None, {"frame": {"duration": 200, "redraw": True}, "fromcurrent": True}]},
-            {"label": "■ Pause", "method": "animate",
-             "args": [[None], {"frame": {"duration": 0, "redraw": False}, "mode": "immediate"}]}
-        ]
-    }]
+
+clientside_callback(
+    ClientsideFunction(namespace="network", function_name="play"),
+    Output("network-slider", "value"),
+    Output("network-player", "disabled"),
+    Output("network-playhead", "data"),
+    Input("network-play", "n_clicks"),
+    Input("network-pause", "n_clicks"),
+    Input("network-player", "n_intervals"),
+    State("network-slider", "value"),
+    State("network-slider", "max"),
+    State("network-frames", "data"),
+    State("network-playhead", "data"),
+    State("network-frame-config", "data"),
 )
 
+
 # 8) Dash layout
-layout = html.Div([
-    dbc.Container([
-        dbc.Row([
-           dbc.Col([
-                html.H2("Network Visualization"),
-                html.H5("Force-directed Layout"),
-                html.P(
-                    """
-                    Force-Directed Layouts, also known as Spring-Embedded Layouts, are a class of algorithms for drawing graphs in an aesthetically pleasing way. The idea behind these algorithms is to consider the graph as a physical system, where nodes repel each other like charged particles, while edges attract their nodes like springs.
-                    """
-                ),
-                 html.P(
-                    """
-                    This layout is excellent for visualizing the overall structure of the network, especially to identify clusters or communities within your data.                    
-                    """
-                ),
-                html.H5("Implementation"),
-                html.P(
-                    """
-                    Every time two attributes (say “Female” and “Browse: daily”) co-occur, we record that as an edge between node u and node v, carrying a weight equal to how often they’ve appeared together. If they haven’t co-occurred, we skip adding the edge.                    
-                    """
-                ),
-                html.P(
-                    """
-                    Using the Fruchterman-Reingold algorithm, NetworkX treats each edge like a spring whose stiffness is the weight. Heavier springs pull harder.                    
-                    """
-                ),
-                html.H5("Visualization Explained"),
-                html.P(
-                    "This animated spring-layout network visualizes the relationships between customer gender, "
-                    "purchase frequency, and browsing frequency. Each node represents a specific attribute (e.g. “Female”, "
-                    "“Browse: Multiple times a day”), and the distance between nodes is proportional to how often those "
-                    "attributes co-occur in the data. Larger nodes indicate higher overall occurrence of that attribute."
-                ),
-                html.H5("Animation"),
-                html.P(
-                    "Use the slider or Play/Pause buttons to step through each record one at a time and watch the network "
-                    "grow. Hover over a node to see its total occurrence count, or near an edge’s midpoint to see the exact "
-                    "co-occurrence count between those two attributes."
-                ),
-                html.H5("Reference"),
-                html.P(
-                    """"""
+def layout(**kwargs):
+    # rows submitted since startup extend the animation in the background (see get_network)
+    network = get_network()
+    total = len(network.snapshots)
+    keys = keyframes(total)
+    last = len(keys) - 1
+    return html.Div([
+        dbc.Container([
+            dbc.Row([
+               dbc.Col([
+                    html.H2("Network Visualization"),
+                    html.H5("Force-directed Layout"),
+                    html.P(
+                        """
+                        Force-Directed Layouts, also known as Spring-Embedded Layouts, are a class of algorithms for drawing graphs in an aesthetically pleasing way. The idea behind these algorithms is to consider the graph as a physical system, where nodes repel each other like charged particles, while edges attract their nodes like springs.
+                        """
+                    ),
+                     html.P(
+                        """
+                        This layout is excellent for visualizing the overall structure of the network, especially to identify clusters or communities within your data.                    
+                        """
+                    ),
+                    html.H5("Implementation"),
+                    html.P(
+                        """
+                        Every time two attributes (say “Female” and “Browse: daily”) co-occur, we record that as an edge between node u and node v, carrying a weight equal to how often they’ve appeared together. If they haven’t co-occurred, we skip adding the edge.                    
+                        """
+                    ),
+                    html.P(
+                        """
+                        Using the Fruchterman-Reingold algorithm (a vectorized version of NetworkX's spring layout), each edge acts like a spring whose stiffness is the weight. Heavier springs pull harder.                    
+                        """
+                    ),
+                    html.H5("Visualization Explained"),
+                    html.P(
+                        "This animated spring-layout network visualizes the relationships between customer gender, "
+                        "purchase frequency, and browsing frequency. Each node represents a specific attribute (e.g. “Female”, "
+                        "“Browse: Multiple times a day”), and the distance between nodes is proportional to how often those "
+                        "attributes co-occur in the data. Larger nodes indicate higher overall occurrence of that attribute."
+                    ),
+                    html.H5("Animation"),
+                    html.P(
+                        "Use the slider or Play/Pause buttons to step through the records and watch the network grow; the "
+                        "slider moves between keyframes a few records apart and playback animates the steps in between. Hover over a node to see its total occurrence count, or near an edge’s midpoint to see the exact "
+                        "co-occurrence count between those two attributes."
+                    ),
+                    html.H5("Reference"),
+                    html.P(
+                        """"""
+                    )
+                ], width=4),
+                dbc.Col(
+                    [
+                        # no artifact to load yet: the frames are being laid out in the background
+                        dbc.Alert("The network is still being laid out. Reload the page in a minute to see it.",
+                                  color="info", is_open=building()),
+                        BigFigureCard("Gender, Purchase Frequency, Browsing Frequency Dynamic Behavior Spring-layout Network",
+                                      caption='Animated spring-layout network showing how co-occurrences between customer gender, purchase frequency, and browsing frequency accumulate record by record. Node size scales with the total number of occurrences of each attribute; invisible midpoint markers capture edge hover-tooltips indicating co-occurrence counts.',
+                                      id="network-graph", figure=build_figure()),
+                        dbc.Row([
+                            dbc.Col(dbc.ButtonGroup([
+                                dbc.Button("▶ Play", id="network-play", color="primary", outline=True, size="sm"),
+                                dbc.Button("■ Pause", id="network-pause", color="primary", outline=True, size="sm"),
+                            ]), width="auto"),
+                            dbc.Col(dcc.Slider(
+                                id="network-slider", min=0, max=last, step=1, value=last, updatemode="drag",
+                                # slider positions are keyframes; label a few with their record number
+                                marks={int(i): f"{keys[i]:,}" for i in np.linspace(0, last, 5).round().astype(int)},
+                            )),
+                            dbc.Col(html.Small(id="network-record", className="text-muted"), width="auto"),
+                        ], align="center"),
+                        dcc.Interval(id="network-player", interval=PLAY_INTERVAL_MS, disabled=True),
+                        # first paint only carries the current keyframe; the rest is fetched in windows
+                        dcc.Store(id="network-frames", data=frame_window(network, last, total)),
+                        dcc.Store(id="network-frame-request"),
+                        dcc.Store(id="network-playhead"),
+                        dcc.Store(id="network-frame-config", data={
+                            "window": FRAME_WINDOW, "prefetch": FRAME_PREFETCH,
+                            "steps": INTERPOLATION_STEPS, "frames": total,
+                        }),
+                    ],
+                    width=8
                 )
-            ], width=4),
-            dbc.Col(
-                BigFigureCard("Gender, Purchase Frequency, Browsing Frequency Dynamic Behavior Spring-layout Network",
-                              caption='Animated spring-layout network showing how co-occurrences between customer gender, purchase frequency, and browsing frequency accumulate record by record. Node size scales with the total number of occurrences of each attribute; invisible midpoint markers capture edge hover-tooltips indicating co-occurrence counts.',
-                              id="network-graph", figure=fig),
-                width=8
-            )
-        ], className="gy-3 p-3")
-    ], fluid=True, style={"min-height": "93vh", "backgroundColor": "#faf9f5"})
-])
+            ], className="gy-3 p-3")
+        ], fluid=True, style={"min-height": "93vh", "backgroundColor": "#faf9f5"})
+    ])
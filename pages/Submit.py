@@ -1,12 +1,10 @@
+import logging
 from dash import html, dcc, Input, Output, callback
 import dash_bootstrap_components as dbc
 import plotly.express as px
 import pandas as pd
 import numpy as np
-import os
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from sqlalchemy import text
 from layout.components.FigureCard import FigureCard
 from dash.exceptions import PreventUpdate
 import dash
@@ -15,6 +13,13 @@ from sqlalchemy import insert
 from sqlalchemy.exc import SQLAlchemyError
 from dash.exceptions import PreventUpdate
 from datetime import datetime
+from data.db import CATEGORY_TABLE, SessionLocal, categories_from_table, get_customer_behavior, get_purchase_categories, refresh
+from data.views import categorize_age
+
+logger = logging.getLogger(__name__)
+
+# ages the form accepts; the survey table holds them in an unsigned 8-bit column
+MIN_AGE, MAX_AGE = 0, 120
 
 dash.register_page(
     __name__,
@@ -23,14 +28,8 @@ dash.register_page(
     description="Dashboard home for Amazon consumer analysis"
 )
 
-load_dotenv()
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Load data once globally
-with SessionLocal() as session:
-    df = pd.read_sql("SELECT * FROM amz_customer_behavior", con=session.bind)
+# Shared frame, loaded once per process
+df = get_customer_behavior()
 
 gender_options = df['gender'].dropna().unique().tolist()
 purchase_freq_options = df['purchase_frequency'].dropna().unique().tolist()
@@ -52,11 +51,7 @@ purchase_categories = df['purchase_categories'].dropna().unique().tolist()
 rating_accuracy_options = df['rating_accuracy'].dropna().unique().tolist()
 shopping_satisfaction_options = df['shopping_satisfaction'].dropna().unique().tolist()
 
-all_categories = df['purchase_categories'].dropna().astype(str).str.split(';')
-flat_list = [item.strip() for sublist in all_categories for item in sublist if isinstance(sublist, list)]
-unique_categories = sorted(set(flat_list))
-
-unique_categories[:10]
+unique_categories = sorted(get_purchase_categories()["category"].unique())
 
 product_category_options = [{"label": c, "value": c} for c in unique_categories]
 
@@ -67,7 +62,7 @@ layout = dbc.Container(className="py-4", children=[
     dbc.Row([
         dbc.Col([
             html.Label("1. What is your age?"),
-            dcc.Input(id="age", type="number", placeholder="Enter your age", className="form-control mb-3")
+            dcc.Input(id="age", type="number", min=MIN_AGE, max=MAX_AGE, step=1, placeholder="Enter your age", className="form-control mb-3")
         ], width=6),
         dbc.Col([
             html.Label("2. What is your gender?"),
@@ -200,20 +195,6 @@ layout = dbc.Container(className="py-4", children=[
 
 ])
 
-def categorize_age(age):
-    if age < 13:
-        return "Child"
-    elif age < 20:
-        return "Teenager"
-    elif age < 36:
-        return "Young Adult"
-    elif age < 51:
-        return "Adult"
-    elif age < 66:
-        return "Middle-aged Adult"
-    else:
-        return "Older Adult"
-    
 @callback(
     Output("form-submit-message", "children"),
     Output("redirect", "href"),
@@ -250,8 +231,13 @@ def submit_survey(n_clicks, age, gender, purchase_frequency, product_categories,
     if not n_clicks:
         raise PreventUpdate
 
-    # Combine selected product categories into a single string
-    combined_categories = ", ".join(product_categories) if product_categories else None
+    # Dash sends None for a number outside min/max, but the callback can be called with anything
+    if not isinstance(age, (int, float)) or age % 1 or not MIN_AGE <= age <= MAX_AGE:
+        return f"❌ Please enter your age as a whole number between {MIN_AGE} and {MAX_AGE}.", no_update
+    age = int(age)
+
+    # Combine selected product categories into a single string, same delimiter as the survey data
+    combined_categories = ";".join(product_categories) if product_categories else None
     age_category = categorize_age(age)
 
     # Construct the insert query
@@ -271,7 +257,9 @@ def submit_survey(n_clicks, age, gender, purchase_frequency, product_categories,
             :review_left, :review_reliability, :review_helpfulness, :recommendation_helpfulness,
             :rating_accuracy, :shopping_satisfaction, :service_appreciation, :improvement_areas
         )
+        RETURNING id
     """
+    category_sql = f"INSERT INTO {CATEGORY_TABLE} (customer_id, category) VALUES (:customer_id, :category)"
 
     values = {
         "timestamp": datetime.now(),
@@ -301,8 +289,21 @@ def submit_survey(n_clicks, age, gender, purchase_frequency, product_categories,
 
     try:
         with SessionLocal() as session:
-            session.execute(text(insert_sql), values)
+            customer_id = session.execute(text(insert_sql), values).scalar_one()
+            # categories go in the same transaction so readers never see a row without them
+            if product_categories and categories_from_table():
+                session.execute(
+                    text(category_sql),
+                    [{"customer_id": customer_id, "category": c} for c in dict.fromkeys(product_categories)],
+                )
             session.commit()
-        return "✅ Your response has been submitted. Thank you!", "/Submit"
     except Exception as e:
-        return f"❌ Submission failed: {str(e)}", no_update
\ No newline at end of file
+        return f"❌ Submission failed: {str(e)}", no_update
+
+    # Show the new response on the dashboard right away; the background refresh retries on failure,
+    # and the row is committed either way
+    try:
+        refresh()
+    except Exception:
+        logger.exception("Refresh after a survey submit failed, the background refresh will retry")
+    return "✅ Your response has been submitted. Thank you!", "/Submit"
\ No newline at end of file
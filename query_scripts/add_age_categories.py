@@ -1,51 +1,86 @@
+# Run from the repo root: python -m query_scripts.add_age_categories [--chunk-size N] [--restart]
+#
+# Backfills amz_customer_behavior.age_category with one set-based UPDATE per chunk of ids.
+# The category is derived inside the database from data.views.age_category_sql, so no rows
+# travel to Python and back. Only rows whose category is missing or wrong are written, which
+# makes it safe to re-run after every bulk import. Progress is checkpointed so an interrupted
+# run resumes from the last finished chunk.
+# The app does not read this column from the table: data.schema.with_age_category derives it
+# from age whenever rows are loaded, so a snapshot or running worker never serves a stale one.
+# The column is kept for the SQL query mode and other readers of the database.
+import argparse
 import json
-import dash_bootstrap_components as dbc
-from dash import html, dcc
 import os
-import pandas as pd
-import plotly.express as px
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-from sqlalchemy import text
-
-load_dotenv()
+import time
 
+from sqlalchemy import text
 
-# Database Configuration
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+from data.db import TABLE_NAME, engine
+from data.snapshot import SNAPSHOT_DIR
+from data.views import age_category_sql
 
-# Load data
-with SessionLocal() as session:
-    df = pd.read_sql("SELECT * FROM amz_customer_behavior", con=session.bind)
+CHECKPOINT = os.path.join(SNAPSHOT_DIR, "age_category_backfill.json")
 
 # with engine.connect() as conn:
 #     conn.execute(text("ALTER TABLE amz_customer_behavior ADD COLUMN age_category TEXT;"))
 #     conn.commit()
-    
-# Prepare figures
-def categorize_age(age):
-    if age < 13:
-        return "Child"
-    elif age < 20:
-        return "Teenager"
-    elif age < 36:
-        return "Young Adult"
-    elif age < 51:
-        return "Adult"
-    elif age < 66:
-        return "Middle-aged Adult"
-    else:
-        return "Older Adult"
-
-df["age_category"] = df["age"].apply(categorize_age)
-
-# Update each row
-with engine.begin() as conn:
-    for index, row in df.iterrows():
-        conn.execute(
-            text("UPDATE amz_customer_behavior SET age_category = :age_cat WHERE id = :id"),
-            {"age_cat": row["age_category"], "id": row["id"]}
-        )
\ No newline at end of file
+
+
+def read_checkpoint():
+    if not os.path.exists(CHECKPOINT):
+        return None
+    with open(CHECKPOINT) as f:
+        return json.load(f)["last_id"]
+
+
+def write_checkpoint(last_id):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    with open(CHECKPOINT, "w") as f:
+        json.dump({"last_id": last_id}, f)
+
+
+def backfill(chunk_size=10000, restart=False):
+    category = age_category_sql("age")
+    update_sql = text(
+        f"UPDATE {TABLE_NAME} SET age_category = {category} "
+        f"WHERE id > :lo AND id <= :hi AND age IS NOT NULL "
+        f"AND (age_category IS NULL OR age_category <> {category})"
+    )
+
+    with engine.connect() as conn:
+        min_id, max_id = conn.execute(text(f"SELECT MIN(id), MAX(id) FROM {TABLE_NAME}")).one()
+    if max_id is None:
+        print("Table is empty, nothing to backfill")
+        return
+
+    resume_from = None if restart else read_checkpoint()
+    lo = resume_from if resume_from is not None and resume_from < max_id else min_id - 1
+    if lo >= min_id:
+        print(f"Resuming after id {lo}")
+
+    scanned = updated = 0
+    start = time.perf_counter()
+    while lo < max_id:
+        hi = min(lo + chunk_size, max_id)
+        # one statement and one transaction per chunk
+        with engine.begin() as conn:
+            updated += conn.execute(update_sql, {"lo": lo, "hi": hi}).rowcount
+        scanned += hi - lo
+        lo = hi
+        write_checkpoint(lo)
+
+        elapsed = time.perf_counter() - start
+        print(f"ids up to {hi}/{max_id}: {updated} updated, {scanned / elapsed:,.0f} ids/s")
+
+    # finished cleanly, next run starts from the beginning again
+    os.remove(CHECKPOINT)
+    elapsed = time.perf_counter() - start
+    print(f"Done: {updated} rows updated over {scanned} ids in {elapsed:.2f}s ({scanned / elapsed:,.0f} ids/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill age_category in chunks")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first id")
+    args = parser.parse_args()
+    backfill(args.chunk_size, args.restart)
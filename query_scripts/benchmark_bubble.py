@@ -0,0 +1,103 @@
+# Run from the repo root: python -m query_scripts.benchmark_bubble [--scales 1 10 100] [--modes cube memory]
+#
+# Times the Dashboard's bubble chart callback on the current survey table and on copies of it
+# repeated 10x and 100x. Each scale is written to a throwaway SQLite database and timed in its own
+# process, so the app loads it exactly as it would load the real table.
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from data.db import CATEGORY_TABLE, TABLE_NAME
+
+CALLS = [
+    (None, None, None, "combined"),
+    (["Female", "Male"], None, None, "combined"),
+    (None, ["Young Adult", "Adult"], None, "facet"),
+    (None, None, ["Beauty and Personal Care", "Clothing and Fashion"], "facet"),
+]
+
+
+def write_scaled(path, scale, limit=None):
+    """The survey table repeated `scale` times (first `limit` rows only, if given) as a SQLite file."""
+    from data.db import get_customer_behavior, get_purchase_categories
+
+    df = get_customer_behavior()
+    categories = get_purchase_categories()
+    step = int(df["id"].max()) + 1
+    sqlite = create_engine(f"sqlite:///{path}")
+    # same rows again under new ids, so every copy keeps its purchase categories
+    base = pd.concat([df.assign(id=df["id"] + i * step) for i in range(scale)], ignore_index=True)
+    bridge = pd.concat(
+        [categories.assign(customer_id=categories["customer_id"] + i * step) for i in range(scale)],
+        ignore_index=True,
+    )
+    if limit is not None:
+        base = base.head(limit)
+        bridge = bridge[bridge["customer_id"].isin(base["id"])]
+    base.astype({col: object for col in base.select_dtypes("category")}).to_sql(TABLE_NAME, sqlite, index=False)
+    bridge.astype({"category": object}).to_sql(CATEGORY_TABLE, sqlite, index=False)
+    return len(base)
+
+
+def run(repeat):
+    """Child process: time the callback against whatever DATABASE_URL points at."""
+    import importlib
+
+    import dash
+
+    start = time.perf_counter()
+    # only the Dashboard page, so its load time isn't mixed up with the other pages'
+    dash.Dash(__name__, use_pages=True, pages_folder="")
+    dashboard = importlib.import_module("pages.Dashboard")
+    # no figure-structure state: a complete figure every call, as on first load
+    dashboard.update_bubble_chart(None, None, None, "combined", "tab-bubble-view", None)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for args in CALLS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            dashboard.update_bubble_chart(*args, "tab-bubble-view", None)
+        timings.append((time.perf_counter() - start) / repeat * 1000)
+    print(f"{load_ms:.0f} " + " ".join(f"{ms:.2f}" for ms in timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bubble chart callback at larger row counts")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--modes", nargs="+", default=["cube", "memory"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run(args.repeat)
+
+    print(f"{'scale':>6}{'rows':>10}  {'mode':<8}{'load ms':>10}" + "".join(f"{'call ' + str(i + 1) + ' ms':>12}" for i in range(len(CALLS))))
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in args.scales:
+            path = os.path.join(tmp, f"x{scale}.db")
+            rows = write_scaled(path, scale)
+            for mode in args.modes:
+                env = dict(
+                    os.environ,
+                    DATABASE_URL=f"sqlite:///{path}",
+                    DASHBOARD_QUERY_MODE=mode,
+                    DASHBOARD_MEMO_SIZE="0",
+                    DATA_REFRESH_SECONDS="0",
+                    SNAPSHOT_DIR=os.path.join(tmp, f"snapshots-x{scale}-{mode}"),
+                )
+                out = subprocess.run(
+                    [sys.executable, "-m", "query_scripts.benchmark_bubble", "--child", "--repeat", str(args.repeat)],
+                    env=env, check=True, capture_output=True, text=True,
+                ).stdout.strip().splitlines()[-1].split()
+                print(f"{scale:>6}{rows:>10}  {mode:<8}{float(out[0]):>10.0f}" + "".join(f"{float(ms):>12.2f}" for ms in out[1:]))
+
+
+if __name__ == "__main__":
+    main()
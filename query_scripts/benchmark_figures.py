@@ -0,0 +1,97 @@
+# Run from the repo root: python -m query_scripts.benchmark_figures [--repeat N]
+#
+# Builds the Dashboard's chart types from the same aggregates twice, once through plotly.express
+# (how the Dashboard used to do it) and once through layout.figures, and prints the build time and
+# the serialized payload size of each.
+import argparse
+import time
+
+import plotly.express as px
+import plotly.io as pio
+
+from data.query import get_query_engine
+from data.views import customer_view, dashboard_view
+from layout import figures
+
+GENDER_COLOR = {"Female": "#E976AA", "Male": "#1D76B5", "Others": "#dde663", "Prefer not to say": "#4F4F4F"}
+
+
+def inputs(query):
+    bubble = query.aggregate(
+        ["age_category", "purchase_frequency", "gender", "purchase_categories"], count=("id", "size")
+    )
+    bubble["xspacing"] = bubble["purchase_frequency"].cat.codes
+    bubble["yspacing"] = bubble["age_category"].cat.codes
+    heat = query.aggregate(["browsing_frequency", "purchase_frequency"], count=("id", "size"))
+    return dict(
+        freq=query.aggregate(["gender", "purchase_frequency"], exploded=False, count=("id", "nunique")),
+        heat=heat.pivot(index="browsing_frequency", columns="purchase_frequency", values="count").fillna(0),
+        ages=query.rows(["gender", "age"], exploded=False),
+        genders=query.aggregate(["gender"], exploded=False, count=("id", "count")),
+        bubble=bubble,
+    )
+
+
+def px_builders(d):
+    return {
+        "grouped bar": lambda: px.bar(d["freq"], x="purchase_frequency", y="count", color="gender",
+                                      barmode="group", color_discrete_map=GENDER_COLOR, template="plotly_white"),
+        "heatmap": lambda: px.imshow(d["heat"], text_auto=True, aspect="auto", color_continuous_scale="Viridis"),
+        "box": lambda: px.box(d["ages"], x="gender", y="age", template="plotly_white"),
+        "pie": lambda: px.pie(d["genders"], values="count", names="gender", color="gender", hole=0.4,
+                              color_discrete_map=GENDER_COLOR),
+        "bubble": lambda: px.scatter(d["bubble"], x="xspacing", y="yspacing", size="count", size_max=40,
+                                     color="gender", color_discrete_map=GENDER_COLOR),
+        "bubble facets": lambda: px.scatter(d["bubble"], x="xspacing", y="yspacing", size="count", size_max=40,
+                                            color="gender", color_discrete_map=GENDER_COLOR,
+                                            facet_col="purchase_categories", facet_col_wrap=3),
+    }
+
+
+def go_builders(d):
+    hover = "%{x}: %{y}<extra></extra>"
+    return {
+        "grouped bar": lambda: figures.grouped_bars(d["freq"], x="purchase_frequency", y="count", group="gender",
+                                                    hovertemplate=hover, color_map=GENDER_COLOR,
+                                                    template="plotly_white"),
+        "heatmap": lambda: figures.heatmap(d["heat"], hovertemplate=hover),
+        "box": lambda: figures.box(d["ages"]["gender"], d["ages"]["age"], hovertemplate=hover,
+                                   template="plotly_white"),
+        "pie": lambda: figures.pie(d["genders"]["gender"], d["genders"]["count"], hovertemplate=hover,
+                                   color_map=GENDER_COLOR),
+        "bubble": lambda: figures.scatter(d["bubble"], x="xspacing", y="yspacing", group="gender", size="count",
+                                          size_max=40, hovertemplate=hover, color_map=GENDER_COLOR),
+        "bubble facets": lambda: figures.scatter(d["bubble"], x="xspacing", y="yspacing", group="gender",
+                                                 size="count", size_max=40, hovertemplate=hover,
+                                                 color_map=GENDER_COLOR, facet="purchase_categories"),
+    }
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fig = fn()
+    return fig, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare plotly.express and layout.figures build times")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    dashboard_view()
+    customer_view()
+    d = inputs(get_query_engine("dashboard", customer_view="dashboard_customers"))
+    express, graph_objects = px_builders(d), go_builders(d)
+
+    print(f"{'figure':<16}{'px ms':>10}{'go ms':>10}{'speedup':>9}{'px bytes':>11}{'go bytes':>11}")
+    for name in express:
+        px_fig, px_ms = timed(express[name], args.repeat)
+        go_fig, go_ms = timed(graph_objects[name], args.repeat)
+        px_bytes = len(pio.to_json(px_fig, validate=False))
+        go_bytes = len(pio.to_json(go_fig, validate=False))
+        print(f"{name:<16}{px_ms:>10.2f}{go_ms:>10.2f}{px_ms / go_ms:>8.1f}x{px_bytes:>11,}{go_bytes:>11,}")
+
+
+if __name__ == "__main__":
+    main()
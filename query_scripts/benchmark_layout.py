@@ -0,0 +1,81 @@
+# Run from the repo root: python -m query_scripts.benchmark_layout [--nodes 100 300 1000]
+#
+# Times one layout call of every engine in data.force_layout.LAYOUT_ENGINES: a warm one (the
+# WARM_ITERATIONS the Network page runs per record, from the previous positions) and a cold one
+# (FIRST_ITERATIONS from random positions), on the Network page's current graph and on random
+# graphs with the given numbers of attribute nodes. Also prints how far each engine ends up from
+# networkx's positions when both start from the same ones.
+import argparse
+import time
+
+import numpy as np
+
+from data.force_layout import GRID_THRESHOLD, LAYOUT_ENGINES
+from data.network import FIRST_ITERATIONS, LAYOUT_SEED, WARM_ITERATIONS
+
+# attribute pairs per node in the random graphs; the survey's 13 attributes have 56 pairs
+EDGES_PER_NODE = 4
+
+
+def current_graph():
+    """Edges, final weights and positions of the Network page's graph."""
+    from data.network import get_network
+
+    network = get_network()
+    edges = np.array([[network.node_index[a], network.node_index[b]] for a, b in network.edges]).reshape(-1, 2)
+    return edges, network.weight.astype(np.float64), network.xy
+
+
+def random_graph(nodes, rng):
+    """Random graph with EDGES_PER_NODE * nodes distinct edges, weights skewed like co-occurrence counts."""
+    count = min(EDGES_PER_NODE * nodes, nodes * (nodes - 1) // 2)
+    picked = set()
+    while len(picked) < count:
+        a, b = rng.integers(0, nodes, 2)
+        if a != b:
+            picked.add((min(a, b), max(a, b)))
+    edges = np.array(sorted(picked))
+    weights = rng.zipf(2.0, len(edges)).astype(np.float64)
+    xy = LAYOUT_ENGINES["numpy"](rng.uniform(-1, 1, (nodes, 2)), edges, weights, k=0.5, seed=LAYOUT_SEED)
+    return edges, weights, xy
+
+
+def timed(layout, xy, edges, weights, iterations):
+    """Best ms per call over enough calls to take about a second, and the positions."""
+    best, spent, calls = float("inf"), 0.0, 0
+    while spent < 1 and calls < 50:
+        start = time.perf_counter()
+        out = layout(xy, edges, weights, k=0.5, iterations=iterations, seed=LAYOUT_SEED)
+        took = time.perf_counter() - start
+        best, spent, calls = min(best, took), spent + took, calls + 1
+    return best * 1000, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Network page's layout engines")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 300, 1000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(LAYOUT_SEED)
+    graphs = [("current", current_graph())] + [(f"random {n}", random_graph(n, rng)) for n in args.nodes]
+
+    print(f"{'graph':<13}{'nodes':>6}{'edges':>7}  {'engine':<9}{'warm ms':>9}{'cold ms':>9}"
+          f"{'warm diff':>11}{'cold diff':>11}")
+    for name, (edges, weights, xy) in graphs:
+        # warm: the settled layout nudged, like a record's new weights would; cold: random positions
+        warm_start = xy + rng.normal(0, 0.05, xy.shape)
+        cold_start = rng.uniform(-1, 1, xy.shape)
+        results = {}
+        for engine, layout in LAYOUT_ENGINES.items():
+            warm_ms, warm = timed(layout, warm_start, edges, weights, WARM_ITERATIONS)
+            cold_ms, cold = timed(layout, cold_start, edges, weights, FIRST_ITERATIONS)
+            results[engine] = warm_ms, cold_ms, warm, cold
+        for engine, (warm_ms, cold_ms, warm, cold) in results.items():
+            reference = results["networkx"]
+            print(f"{name:<13}{len(xy):>6}{len(edges):>7}  {engine:<9}{warm_ms:>9.1f}{cold_ms:>9.1f}"
+                  f"{np.abs(warm - reference[2]).max():>11.1e}{np.abs(cold - reference[3]).max():>11.1e}")
+    print(f"(the numpy engine approximates repulsion with a grid above {GRID_THRESHOLD} nodes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Run from the repo root: python -m query_scripts.benchmark_network [--records 1000 10000 100000]
+#     [--engine numpy|networkx] [--workers N]
+#
+# Times laying out the Network page's animation (what query_scripts.build_network does) and
+# loading the resulting artifact (what an app worker does at startup) for survey tables of the
+# given sizes. Each size is a throwaway SQLite copy of the current table, repeated as often as
+# needed, and is loaded in its own process exactly as the app would load it.
+import argparse
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from query_scripts.benchmark_bubble import write_scaled
+
+
+def run(engine, workers):
+    """Child process: build and load the Network artifact against whatever DATABASE_URL points at."""
+    from data.db import get_tables_version
+    from data.network import NETWORK_ARTIFACT, Network
+
+    # load the table first, so only the network's own work is timed
+    df, _, version = get_tables_version()
+    start = time.perf_counter()
+    network = Network.build(df, version, engine, workers)
+    build_s = time.perf_counter() - start
+    network.save()
+    start = time.perf_counter()
+    Network.load()
+    load_s = time.perf_counter() - start
+    print(f"{build_s:.2f} {len(network.snapshots)} {load_s:.3f} {os.path.getsize(NETWORK_ARTIFACT)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Network build and load at larger row counts")
+    parser.add_argument("--records", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--engine", default=None, help="layout engine (default NETWORK_LAYOUT_ENGINE or numpy)")
+    parser.add_argument("--workers", type=int, default=1, help="processes laying out records (default 1)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run(args.engine, args.workers)
+
+    from data.db import get_customer_behavior
+    from data.network import LAYOUT_ENGINE
+
+    engine = args.engine or LAYOUT_ENGINE
+    print(f"engine {engine}, {args.workers} worker(s)")
+    base_rows = len(get_customer_behavior())
+    print(f"{'records':>9}{'frames':>9}{'build s':>9}{'ms/record':>11}{'load s':>9}{'artifact KB':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for records in args.records:
+            path = os.path.join(tmp, f"n{records}.db")
+            write_scaled(path, math.ceil(records / base_rows), limit=records)
+            env = dict(
+                os.environ,
+                DATABASE_URL=f"sqlite:///{path}",
+                DATA_REFRESH_SECONDS="0",
+                SNAPSHOT_DIR=os.path.join(tmp, f"snapshots-n{records}"),
+                # never overwrite the app's own artifact with the synthetic table's
+                NETWORK_ARTIFACT=os.path.join(tmp, f"network-n{records}.npz"),
+            )
+            out = subprocess.run(
+                [sys.executable, "-m", "query_scripts.benchmark_network", "--child",
+                 "--engine", engine, "--workers", str(args.workers)],
+                env=env, check=True, capture_output=True, text=True,
+            ).stdout.strip().splitlines()[-1].split()
+            seconds, frames, load_s, size = float(out[0]), int(out[1]), float(out[2]), int(out[3])
+            print(f"{records:>9}{frames:>9}{seconds:>9.2f}{seconds / records * 1000:>11.2f}"
+                  f"{load_s:>9.3f}{size / 1024:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+# Run from the repo root: python -m query_scripts.build_network [--output PATH] [--engine numpy|networkx] [--workers N]
+#
+# Lays out the Network page's animation for the current data version and writes it to a
+# compressed .npz (positions as float32) that the page loads instead of building it at startup.
+# Run it as part of the deploy's build step; the app then only lays out rows added afterwards.
+# --workers lays the records out in a process pool, in segments (see Network._lay_out_parallel).
+import argparse
+import os
+import time
+
+from data.force_layout import LAYOUT_ENGINES
+from data.network import LAYOUT_ENGINE, NETWORK_ARTIFACT, build_network
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the Network page's animation")
+    parser.add_argument("--output", default=NETWORK_ARTIFACT, help=f"artifact path (default {NETWORK_ARTIFACT})")
+    parser.add_argument("--engine", default=LAYOUT_ENGINE, choices=sorted(LAYOUT_ENGINES),
+                        help=f"layout engine (default {LAYOUT_ENGINE}, NETWORK_LAYOUT_ENGINE sets the app's)")
+    parser.add_argument("--workers", type=int, default=1, help="processes laying out records (default 1)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    network = build_network(args.output, args.engine, args.workers)
+    print(f"version {network.version} ({network.engine}): {len(network.snapshots)} frames, {len(network.nodes)} nodes, "
+          f"{len(network.edges)} edges in {time.perf_counter() - start:.1f}s")
+    print(f"wrote {args.output} ({os.path.getsize(args.output) / 1024:,.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Run from the repo root: python -m query_scripts.compare_query_modes [--stand-in]
+#
+# Runs the Dashboard's filter + group-by queries through the in-memory path, the aggregate
+# cube and the SQL push-down path, checks they agree, and prints the time each one takes.
+# --stand-in copies the table into an in-memory SQLite database so no Postgres is needed.
+import argparse
+import time
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from data.db import CATEGORY_TABLE, TABLE_NAME, engine, get_customer_behavior, get_purchase_categories
+from data.cube import CubeQuery
+from data.query import MemoryQuery, SqlQuery
+from data.views import customer_view, dashboard_view
+
+FILTERS = [
+    {},
+    {"gender": ["Female", "Male"]},
+    {"gender": ["Female"], "age_category": ["Young Adult", "Adult"]},
+    {"purchase_categories": ["Beauty and Personal Care", "Clothing and Fashion"]},
+]
+
+QUERIES = [
+    ("age category customers", dict(by=["age_category"], exploded=False, count=("id", "nunique"))),
+    ("frequency by gender", dict(by=["gender", "purchase_frequency"], exploded=False, count=("id", "nunique"))),
+    ("browse vs purchase", dict(by=["browsing_frequency", "purchase_frequency"], count=("id", "size"))),
+    ("category overview", dict(by=["gender", "purchase_categories"],
+                               RawCount=("purchase_categories", "size"), AvgAge=("age", "mean"))),
+    ("gender totals", dict(by=["gender"], exploded=False, RawCount=("id", "count"))),
+    ("bubble counts", dict(by=["age_category", "purchase_frequency", "gender", "purchase_categories"],
+                           count=("id", "size"))),
+]
+
+
+def stand_in_engine():
+    sqlite = create_engine("sqlite://")
+    get_customer_behavior().to_sql(TABLE_NAME, sqlite, index=False)
+    get_purchase_categories().to_sql(CATEGORY_TABLE, sqlite, index=False)
+    return sqlite
+
+
+def same(expected, actual, by):
+    try:
+        pd.testing.assert_frame_equal(
+            expected.astype({col: str for col in by}), actual.astype({col: str for col in by}),
+            check_dtype=False, check_exact=False,
+        )
+        return True
+    except AssertionError:
+        return False
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare in-memory, cube and SQL push-down Dashboard queries")
+    parser.add_argument("--stand-in", action="store_true", help="compare against a local SQLite copy")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    dashboard_view()
+    customer_view()
+    memory = MemoryQuery("dashboard", "dashboard_customers")
+    cube = CubeQuery("dashboard", "dashboard_customers")
+    sql = SqlQuery(stand_in_engine() if args.stand_in else engine)
+
+    mismatches = 0
+    print(f"{'query':<26}{'filters':<60}{'memory ms':>10}{'cube ms':>10}{'sql ms':>10}  match")
+    for name, spec in QUERIES:
+        spec = dict(spec)
+        by = spec.pop("by")
+        exploded = spec.pop("exploded", True)
+        for filters in FILTERS:
+            mem, mem_ms = timed(lambda: memory.aggregate(by, filters, exploded, **spec), args.repeat)
+            cub, cube_ms = timed(lambda: cube.aggregate(by, filters, exploded, **spec), args.repeat)
+            out, sql_ms = timed(lambda: sql.aggregate(by, filters, exploded, **spec), args.repeat)
+            # the cube and SQL paths don't promise the in-memory row order
+            mem = mem.sort_values(by, ignore_index=True)
+            ok = same(mem, cub.sort_values(by, ignore_index=True), by) and same(mem, out.sort_values(by, ignore_index=True), by)
+            mismatches += not ok
+            match = "yes" if ok else "NO"
+            print(f"{name:<26}{str(filters)[:58]:<60}{mem_ms:>10.2f}{cube_ms:>10.2f}{sql_ms:>10.2f}  {match}")
+
+    if mismatches:
+        raise SystemExit(f"{mismatches} result(s) differ between query modes")
+
+
+if __name__ == "__main__":
+    main()
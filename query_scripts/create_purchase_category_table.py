@@ -0,0 +1,61 @@
+# Run from the repo root: python -m query_scripts.create_purchase_category_table
+#
+# Creates customer_purchase_category(customer_id, category) and fills it from the existing
+# purchase_categories strings. Older Submit rows were joined with ", " instead of ";", so those
+# are normalised first. Safe to re-run: existing pairs are left alone.
+from sqlalchemy import text
+
+from data.db import CATEGORY_TABLE, TABLE_NAME, engine
+
+CREATE_SQL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {CATEGORY_TABLE} (
+        customer_id INTEGER NOT NULL REFERENCES {TABLE_NAME}(id) ON DELETE CASCADE,
+        category TEXT NOT NULL,
+        PRIMARY KEY (customer_id, category)
+    )
+    """,
+    # the primary key covers lookups by customer; this one covers filtering by category
+    f"CREATE INDEX IF NOT EXISTS ix_{CATEGORY_TABLE}_category ON {CATEGORY_TABLE} (category, customer_id)",
+]
+
+NORMALISE_SQL = (
+    f"UPDATE {TABLE_NAME} SET purchase_categories = REPLACE(purchase_categories, ', ', ';') "
+    f"WHERE purchase_categories LIKE '%, %'"
+)
+
+
+def split_sql(dialect):
+    """SELECT of (customer_id, category) pairs parsed from the delimited column."""
+    if dialect == "postgresql":
+        return (
+            f"SELECT id AS customer_id, TRIM(UNNEST(STRING_TO_ARRAY(purchase_categories, ';'))) AS category"
+            f" FROM {TABLE_NAME}"
+        )
+    # portable string split for SQLite
+    return (
+        "WITH RECURSIVE split(customer_id, category, rest) AS ("
+        f" SELECT id, NULL, COALESCE(purchase_categories, '') || ';' FROM {TABLE_NAME}"
+        " UNION ALL"
+        " SELECT customer_id, TRIM(SUBSTR(rest, 1, INSTR(rest, ';') - 1)), SUBSTR(rest, INSTR(rest, ';') + 1)"
+        " FROM split WHERE rest <> ''"
+        ") SELECT customer_id, category FROM split WHERE category IS NOT NULL"
+    )
+
+
+def migrate():
+    with engine.begin() as conn:
+        for sql in CREATE_SQL:
+            conn.execute(text(sql))
+        normalised = conn.execute(text(NORMALISE_SQL)).rowcount
+        inserted = conn.execute(text(
+            f"INSERT INTO {CATEGORY_TABLE} (customer_id, category) "
+            f"SELECT DISTINCT customer_id, category FROM ({split_sql(engine.dialect.name)}) pairs "
+            f"WHERE category <> '' "
+            f"ON CONFLICT DO NOTHING"
+        )).rowcount
+    print(f"Normalised {normalised} delimiter(s), inserted {inserted} customer/category pair(s)")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -1,23 +1,5 @@
-import json
-import dash_bootstrap_components as dbc
-from dash import html, dcc
-import os
-import pandas as pd
-import plotly.express as px
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-from sqlalchemy import text
-
-load_dotenv()
-
-
-# Database Configuration
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Run from the repo root: python -m query_scripts.info
+from data.db import get_customer_behavior
 
 # Load data
-with SessionLocal() as session:
-    df = pd.read_sql("SELECT * FROM amz_customer_behavior", con=session.bind)
-
+df = get_customer_behavior()
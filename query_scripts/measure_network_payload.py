@@ -0,0 +1,63 @@
+# Run from the repo root: python -m query_scripts.measure_network_payload
+#
+# Prints what the Network page sends for each keyframe schedule: the page layout (first paint),
+# the windows needed to play the whole animation, and how long the server takes for both.
+# Each schedule runs in its own process, since the schedule is read from the environment.
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCHEDULES = {
+    "every record": {"NETWORK_KEYFRAME_SCHEDULE": "stride", "NETWORK_KEYFRAME_STRIDE": "1"},
+    "every 10th": {"NETWORK_KEYFRAME_SCHEDULE": "stride", "NETWORK_KEYFRAME_STRIDE": "10"},
+    "log, 200": {"NETWORK_KEYFRAME_SCHEDULE": "log", "NETWORK_KEYFRAME_COUNT": "200"},
+}
+
+
+def run():
+    """Child process: measure the schedule set in the environment."""
+    import dash
+    from plotly.utils import PlotlyJSONEncoder
+
+    dash.Dash(__name__, use_pages=True, pages_folder="")
+    from data.network import building, get_network
+    from pages import Network
+
+    # load the artifact first (or wait for the background build), so only the page's own work is timed
+    get_network()
+    while building():
+        time.sleep(0.1)
+    size = lambda value: len(json.dumps(value, cls=PlotlyJSONEncoder))
+    start = time.perf_counter()
+    page = Network.layout().to_plotly_json()
+    layout_ms = (time.perf_counter() - start) * 1000
+
+    network = get_network()
+    total = len(network.snapshots)
+    keys = Network.keyframes(total)
+    start = time.perf_counter()
+    windows = [Network.frame_window(network, i, total) for i in range(0, len(keys), Network.FRAME_WINDOW)]
+    windows_ms = (time.perf_counter() - start) * 1000
+    print(len(keys), size(page), f"{layout_ms:.1f}", sum(map(size, windows)), len(windows), f"{windows_ms:.1f}")
+
+
+def main():
+    if "--child" in sys.argv:
+        return run()
+
+    print(f"{'schedule':<14}{'keyframes':>10}{'page bytes':>12}{'page ms':>9}"
+          f"{'playback bytes':>16}{'requests':>10}{'server ms':>11}")
+    for name, env in SCHEDULES.items():
+        out = subprocess.run(
+            [sys.executable, "-m", "query_scripts.measure_network_payload", "--child"],
+            env=dict(os.environ, **env), check=True, capture_output=True, text=True,
+        ).stdout.strip().splitlines()[-1].split()
+        keys, page, page_ms, playback, requests, server_ms = out
+        print(f"{name:<14}{int(keys):>10,}{int(page):>12,}{float(page_ms):>9.1f}"
+              f"{int(playback):>16,}{int(requests):>10}{float(server_ms):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
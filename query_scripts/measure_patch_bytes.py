@@ -0,0 +1,109 @@
+# Run from the repo root: python -m query_scripts.measure_patch_bytes
+#
+# Replays a series of filter changes against the Dashboard's callbacks through Dash's own
+# /_dash-update-component endpoint, once sending complete figures and once with
+# layout.patches on, and prints the response bytes of every interaction.
+import json
+
+from layout import patches
+
+# (callback, {input id: value} changed in this step); every step keeps the earlier values
+INTERACTIONS = {
+    "demographics": [
+        {"dashboard-tabs": "tab-demographics", "gender-filter-demographics": None,
+         "age-cat-filter-demographics": None, "demographics-mode": "normal"},
+        {"gender-filter-demographics": ["Female"]},
+        {"gender-filter-demographics": ["Female", "Male"]},
+        {"age-cat-filter-demographics": ["Adult"]},
+        {"demographics-mode": "distribution"},
+        {"gender-filter-demographics": ["Male"]},
+    ],
+    "correlation": [
+        {"dashboard-tabs": "tab-corr", "gender-filter-corr": None, "age-cat-filter-corr": None,
+         "product-cat-filter-corr": None},
+        {"gender-filter-corr": ["Female"]},
+        {"age-cat-filter-corr": ["Adult", "Young Adult"]},
+    ],
+    "bubble": [
+        {"dashboard-tabs": "tab-bubble-view", "bubble-gender-filter": None, "bubble-age-filter": None,
+         "bubble-product-filter": None, "bubble-view-toggle": "combined"},
+        {"bubble-gender-filter": ["Female", "Male"]},
+        {"bubble-age-filter": ["Adult"]},
+        {"bubble-view-toggle": "facet"},
+        {"bubble-gender-filter": ["Female"]},
+    ],
+    "reviews": [
+        {"dashboard-tabs": "tab-reviews", "gender-filter-rev": None, "age-cat-filter-rev": None,
+         "swarm-mode-rev": "auto"},
+        {"gender-filter-rev": ["Female"]},
+        {"age-cat-filter-rev": ["Adult"]},
+        {"swarm-mode-rev": "density"},
+        {"gender-filter-rev": ["Male"]},
+    ],
+}
+
+
+def component_id(value):
+    return json.loads(value) if value.startswith("{") else value
+
+
+def find_callback(dependencies, name):
+    for dep in dependencies:
+        if any(f'"index":"{name}","type":"figure-structure"' in s["id"] for s in dep["state"]):
+            return dep
+    raise LookupError(f"No callback writes the {name!r} figure-structure store")
+
+
+def replay(client, dep, steps):
+    """Response bytes of each step, feeding back the structure store like the browser does."""
+    outputs = [
+        {"id": component_id(o.rsplit(".", 1)[0]), "property": o.rsplit(".", 1)[1]}
+        for o in dep["output"].strip(".").split("...")
+    ]
+    values, store, sizes = {}, None, []
+    for step in steps:
+        values.update(step)
+        body = {
+            "output": dep["output"],
+            "outputs": outputs,
+            "inputs": [
+                {"id": component_id(i["id"]), "property": i["property"], "value": values.get(i["id"])}
+                for i in dep["inputs"]
+            ],
+            "state": [{"id": component_id(s["id"]), "property": s["property"], "value": store} for s in dep["state"]],
+            "changedPropIds": [f"{key}.value" for key in step],
+        }
+        response = client.post("/_dash-update-component", json=body)
+        if response.status_code != 200:
+            raise RuntimeError(f"{dep['output']} answered {response.status_code}: {response.data[:500]!r}")
+        sizes.append(len(response.data))
+        for key, props in response.get_json()["response"].items():
+            if "figure-structure" in key:
+                store = props["data"]
+    return sizes
+
+
+def main():
+    import app
+
+    client = app.app.server.test_client()
+    dependencies = client.get("/_dash-dependencies").get_json()
+
+    print(f"{'callback':<14}{'step':>5}  {'changed':<34}{'full bytes':>12}{'patched bytes':>15}")
+    totals = [0, 0]
+    for name, steps in INTERACTIONS.items():
+        dep = find_callback(dependencies, name)
+        patches.PATCH_FIGURES = False
+        full = replay(client, dep, steps)
+        patches.PATCH_FIGURES = True
+        patched = replay(client, dep, steps)
+        for i, step in enumerate(steps):
+            changed = "initial" if i == 0 else ", ".join(f"{k}={v}" for k, v in step.items())
+            print(f"{name:<14}{i + 1:>5}  {changed[:33]:<34}{full[i]:>12,}{patched[i]:>15,}")
+        totals[0] += sum(full)
+        totals[1] += sum(patched)
+    print(f"{'total':<55}{totals[0]:>12,}{totals[1]:>15,}")
+
+
+if __name__ == "__main__":
+    main()
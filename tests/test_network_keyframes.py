@@ -0,0 +1,30 @@
+import os
+
+import dash
+import pytest
+
+# pages.Network imports data.db, which needs a database URL, and registers itself as a page
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+dash.Dash(__name__, use_pages=True, pages_folder="")
+
+from pages import Network  # noqa: E402
+
+
+@pytest.fixture(params=["stride", "log"])
+def schedule(request, monkeypatch):
+    monkeypatch.setattr(Network, "KEYFRAME_SCHEDULE", request.param)
+    Network.keyframes.cache_clear()
+    yield request.param
+    Network.keyframes.cache_clear()
+
+
+@pytest.mark.parametrize("total", [1, 2, 3, 11, 12, 500])
+def test_keyframes_stay_within_the_frames(schedule, total):
+    keys = Network.keyframes(total)
+    assert keys[0] == 0 and keys[-1] == total - 1
+    assert keys == sorted(set(keys))
+    assert all(0 <= key < total for key in keys)
+
+
+def test_only_the_blank_frame(schedule):
+    assert Network.keyframes(1) == [0]